@@ -0,0 +1,83 @@
+### Cold import time benchmark for the module nk_nlp1_5
+### Usage: python import_benchmark.py [--repeat 10] [--output import_benchmark.csv] [--module-dir ../2_spam_detector_NLP_Python]
+
+import argparse
+import csv
+import datetime
+import os
+import statistics
+import subprocess
+import sys
+
+# every measurement is made in a new interpreter, so nothing is imported before
+CODE = 'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+
+HEAVY_MODULES = ['spacy', 'sklearn', 'scipy', 'ipywidgets', 'IPython']
+
+# the directory of this script, the module is duplicated in the other project directories
+DEFAULT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure(module='nk_nlp1_5', repeat=10, module_dir=DEFAULT_DIR):
+    """ Measures the cold import time of the given module in seconds.
+
+    Parameters
+    ----------
+    module : str, optional
+        A name of the measured module (default is 'nk_nlp1_5')
+    repeat : int, optional
+        A number of measurements (default is 10)
+    module_dir : str, optional
+        A directory the module is imported from (default is the directory of this script)
+
+    Returns
+    -------
+    list
+        The import times of every measurement.
+    """
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', CODE.format(module=module)], cwd=module_dir,
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return times
+
+
+def loaded_heavy_modules(module='nk_nlp1_5', module_dir=DEFAULT_DIR):
+    """ Returns the heavy dependencies loaded by importing the given module."""
+    code = f'import sys, {module}; print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=module_dir,
+                            capture_output=True, text=True, check=True).stdout
+    return output.strip().splitlines()[-1] if output.strip() else ''
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measures the cold import time of nk_nlp1_5.')
+    parser.add_argument('--module', default='nk_nlp1_5')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--module-dir', default=DEFAULT_DIR, help='directory the module is imported from')
+    parser.add_argument('--output', default=None, help='CSV file the result is appended to')
+    args = parser.parse_args()
+
+    module_dir = os.path.abspath(args.module_dir)
+    times = measure(args.module, args.repeat, module_dir)
+    result = {'date': datetime.datetime.now().isoformat(timespec='seconds'),
+              'python': sys.version.split()[0],
+              'module': args.module,
+              'module_dir': os.path.relpath(module_dir, os.path.dirname(DEFAULT_DIR)),
+              'repeat': args.repeat,
+              'min_s': round(min(times), 4),
+              'median_s': round(statistics.median(times), 4),
+              'heavy_modules_loaded': loaded_heavy_modules(args.module, module_dir)}
+
+    for key, value in result.items():
+        print(f'{key}: {value}')
+
+    # appending the result to the history of measurements
+    if args.output:
+        new_file = not os.path.exists(args.output)
+        with open(args.output, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(result))
+            if new_file:
+                writer.writeheader()
+            writer.writerow(result)
@@ -2,23 +2,1363 @@
 
 import pandas as pd
 import numpy as np
-import spacy
-from spacy.matcher import Matcher
-from spacy.tokens import Span, Doc, DocBin
 
 import re
 import os
 import sys
-from IPython.display import clear_output
+import json
+import shutil
+import hashlib
+import inspect
+import logging
+import weakref
 
-from sklearn.model_selection import train_test_split
-from sklearn.metrics.pairwise import cosine_similarity, euclidean_distances
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# spacy, sklearn and scipy are imported in the methods which need them, so the module is imported fast
+# and the methods working only with pandas and re (replace, extract, mapper, ...) don't wait for them
+
+# defining classes for progress indicators
+
+class ProgressBar:
+    """ Progress indicator which shows nothing. It is the base class for the other indicators.
+    The indicator is redrawn not more often than once in 'min_interval' seconds and at the end.
+
+    Parameters
+    ----------
+    total : int
+        A number of steps of the process.
+    message : str, optional
+        A description of the indicator (default is 'Progress:')
+    min_interval : float, optional
+        The minimal interval between redrawings in seconds (default is 0.5)
+    """
+
+    def __init__(self, total, message='Progress:', min_interval=0.5):
+
+        self.total = total
+        self.message = message
+        self.min_interval = min_interval
+        self.value = 0
+        self._last_time = None
+
+    def update(self, value=None):
+        """ Sets the given number of done steps or adds one step if the value is None."""
+        self.value = self.value + 1 if value is None else value
+        now = time.monotonic()
+        if self._last_time is None or now - self._last_time >= self.min_interval or self.value == self.total:
+            self._last_time = now
+            self._render()
+
+    def close(self):
+        """ Finishes the indicator."""
+        pass
+
+    def _render(self):
+        pass
+
+
+class WidgetProgressBar(ProgressBar):
+    """ Progress indicator in Jupyter notebooks using ipywidgets."""
+
+    def __init__(self, total, message='Progress:', min_interval=0.5):
+
+        super().__init__(total, message, min_interval)
+        # ipywidgets and IPython are needed only for this indicator
+        import ipywidgets as widgets
+        from IPython.display import display
+
+        self._progr = widgets.IntProgress(description=message, min=0, max=total)
+        self._label = widgets.Label(value="0")
+        display(widgets.HBox([self._progr, self._label]))
+
+    def _render(self):
+        self._progr.value = self.value
+        self._label.value = f'{self.value} of {self.total}'
+
+
+class TqdmProgressBar(ProgressBar):
+    """ Progress indicator in the console using tqdm."""
+
+    def __init__(self, total, message='Progress:', min_interval=0.5):
+
+        super().__init__(total, message, min_interval)
+        from tqdm import tqdm
+
+        self._bar = tqdm(total=total, desc=message, mininterval=min_interval)
+
+    def _render(self):
+        self._bar.update(self.value - self._bar.n)
+
+    def close(self):
+        self._render()
+        self._bar.close()
+
+
+class LogProgressBar(ProgressBar):
+    """ Progress indicator writing messages to the log of the module."""
+
+    def __init__(self, total, message='Progress:', min_interval=5):
+
+        super().__init__(total, message, min_interval)
+
+    def _render(self):
+        logging.getLogger(__name__).info('%s %s of %s', self.message, self.value, self.total)
+
+
+PROGRESS_BACKENDS = {'widget': WidgetProgressBar, 'tqdm': TqdmProgressBar, 'log': LogProgressBar, None: ProgressBar}
+
+def make_progress_bar(backend, total, message='Progress:'):
+    """ Creates the progress indicator of the given backend.
+
+    Parameters
+    ----------
+    backend : str, ProgressBar subclass or None
+        {widget|tqdm|log} or None for no indicator, or a custom subclass of ProgressBar.
+    total : int
+        A number of steps of the process.
+    message : str, optional
+        A description of the indicator (default is 'Progress:')
+
+    Returns
+    -------
+    ProgressBar
+    """
+    if isinstance(backend, type) and issubclass(backend, ProgressBar):
+        return backend(total, message)
+    return PROGRESS_BACKENDS[backend](total, message)
+
+### ------------------------------------------------------------------------------------------
+
+def _join_groups(groups, values, sep):
+    """ Joins the values of every group by sep keeping their order.
+        Returns the sorted groups and the list of the joined strings.
+        The grouping is made by numpy, but the strings are still joined by one str.join per group:
+        numpy has no vectorized string concatenation over groups, and groupby().agg / str.cat call
+        the same join for every group with more overhead."""
+    order = np.argsort(groups, kind='stable')
+    groups, values = groups[order], values[order]
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(groups) else np.zeros(0, dtype=np.int64)
+    ends = np.r_[starts[1:], len(groups)]
+    return groups[starts], [sep.join(values[start:end]) for start, end in zip(starts, ends)]
+
+# the results of the check of the sample Doc for every model and its pipeline
+_STATIC_VECTORS_CHECKS = weakref.WeakKeyDictionary()
+
+def _static_vectors_only(nlp):
+    """ Returns True if the Doc vectors of the model are the means of its static word vectors,
+        so the texts can be only tokenized instead of parsing with the whole pipeline.
+        A sample Doc is parsed once with the whole pipeline: the components setting user hooks
+        (which may replace vector, has_vector or similarity) disable the fast path."""
+    vectors = nlp.vocab.vectors
+    if not vectors.size or getattr(vectors, 'mode', 'default') != 'default':
+        return False
+
+    pipe_names = tuple(nlp.pipe_names)
+    checked = _STATIC_VECTORS_CHECKS.get(nlp)
+    if checked is None or checked[0] != pipe_names:
+        doc = nlp('A sample text for the check of the pipeline.')
+        checked = (pipe_names, not (doc.user_hooks or doc.user_token_hooks or doc.user_span_hooks))
+        _STATIC_VECTORS_CHECKS[nlp] = checked
+    return checked[1]
+
+def _static_doc_vectors(nlp, texts, batch_size=1000):
+    """ Tokenizes the texts and computes their vectors as the means of the static word vectors in bulk.
+        The result is equal to doc.vector and doc.has_vector of the parsed Docs.
+
+    Parameters
+    ----------
+    nlp : spacy model class
+        Model with static vectors (see _static_vectors_only).
+    texts : list or pd.Series
+        Strings for the processing.
+    batch_size : int, optional
+        A number of texts looked up in the vectors table at once (default is 1000)
+
+    Returns
+    -------
+    tuple
+        The list of the tokenized Docs, the float32 matrix of the vectors and the boolean mask of has_vector.
+    """
+    from spacy.attrs import ORTH
+
+    vectors = nlp.vocab.vectors
+    attr = getattr(vectors, 'attr', ORTH)
+    data = vectors.data
+    texts = list(texts)
+    docs = []
+    matrix = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+    has_vector = np.zeros(len(texts), dtype=bool)
+
+    for batch_start in range(0, len(texts), batch_size):
+        batch = list(nlp.tokenizer.pipe(texts[batch_start:batch_start + batch_size]))
+        docs.extend(batch)
+        lengths = np.fromiter((len(doc) for doc in batch), dtype=np.int64, count=len(batch))
+        filled = np.flatnonzero(lengths)
+        if not len(filled):
+            continue
+
+        # one lookup of the vectors table for all tokens of the batch, missing keys give zero vectors
+        keys = np.concatenate([batch[i].to_array(attr) for i in filled]).astype(np.uint64)
+        rows = vectors.find(keys=keys)
+        found = rows >= 0
+        token_vectors = np.zeros((len(keys), vectors.shape[1]), dtype=np.float32)
+        token_vectors[found] = data[rows[found]]
+
+        # the sums are token by token as in doc.vector (reduceat sums in another order), empty Docs keep zero vectors
+        starts = np.r_[0, np.cumsum(lengths[filled])[:-1]]
+        order = np.argsort(-lengths[filled], kind='stable')
+        sorted_starts, sorted_lengths = starts[order], lengths[filled][order]
+        sums = np.zeros((len(filled), vectors.shape[1]), dtype=np.float32)
+        for position in range(sorted_lengths[0]):
+            active = np.searchsorted(-sorted_lengths, -position, side='left')
+            sums[:active] += token_vectors[sorted_starts[:active] + position]
+        matrix[batch_start + filled[order]] = sums / sorted_lengths[:, None].astype(np.float32)
+        has_vector[batch_start + filled] = np.logical_or.reduceat(found, starts)
+
+    return docs, matrix, has_vector
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for the chain of regexp operations
+
+class CleaningPipeline:
+    """ Ordered list of replace and extract operations (like TextPreprocessing.replace and .extract)
+    which are compiled once and applied to every row in one pass without intermediate columns.
+
+    Parameters
+    ----------
+    steps : list or None, optional
+        A list of dicts with the keys 'op' ('replace' or 'extract'), 'regexp' and optional
+        'repl' and 'sep_for_tokens', e.g. {'op': 'replace', 'regexp': r'\\d+', 'repl': ' '} (default is None)
+
+    Attributes
+    ----------
+    steps : list
+        The list of the operations as dicts.
+
+    Methods
+    -------
+    replace
+        Adds the replacement operation to the pipeline.
+    extract
+        Adds the extraction operation to the pipeline.
+    process
+        Applies all operations to the text.
+    apply
+        Applies all operations to every row of the given column.
+    """
+
+    def __init__(self, steps=None):
+
+        self.steps = []
+        self._compiled = []
+        for step in steps or []:
+            step = dict(step)
+            op = step.pop('op')
+            if op == 'replace':
+                self.replace(**step)
+            elif op == 'extract':
+                self.extract(**step)
+            else:
+                raise ValueError(f'Unknown operation "{op}". Use "replace" or "extract"')
+
+    def replace(self, regexp, repl='', sep_for_tokens=''):
+        """ Adds the replacement operation to the pipeline and returns the pipeline."""
+        self.steps.append({'op': 'replace', 'regexp': regexp, 'repl': repl, 'sep_for_tokens': sep_for_tokens})
+        self._compiled.append(('replace', re.compile(regexp), repl, sep_for_tokens))
+        return self
+
+    def extract(self, regexp, sep_for_tokens=''):
+        """ Adds the extraction operation to the pipeline and returns the pipeline."""
+        self.steps.append({'op': 'extract', 'regexp': regexp, 'sep_for_tokens': sep_for_tokens})
+        self._compiled.append(('extract', re.compile(regexp), None, sep_for_tokens))
+        return self
+
+    def __len__(self):
+        return len(self.steps)
+
+    def process(self, string):
+        """ Applies all operations of the pipeline to the text one by one."""
+        if pd.isna(string):
+            return string
+        for op, regex, repl, sep_for_tokens in self._compiled:
+            if sep_for_tokens:
+                lst = str(string).split(sep_for_tokens)
+            else:
+                lst = [string]
+
+            result = []
+            for elem in lst:
+                if op == 'replace':
+                    proc_res = regex.sub(repl, elem)
+                else:
+                    proc_res = ''.join(regex.findall(elem))
+                if proc_res:
+                    result.append(proc_res)
+            string = sep_for_tokens.join(result)
+        return string
+
+    def vectorizable(self, text_col):
+        """ Checks if the pipeline can be applied to the given column by vectorized pandas string methods:
+            all values are strings or NaN and extracting regexps have no groups."""
+        for op, regex, repl, sep_for_tokens in self._compiled:
+            if op == 'extract' and regex.groups:
+                return False
+        return pd.api.types.infer_dtype(text_col, skipna=True) in ('string', 'empty')
+
+    def apply(self, text_col, engine='auto', string_dtype=None):
+        """ Applies all operations of the pipeline to every row of the given column.
+
+        Parameters
+        ----------
+        text_col : pd.Series
+            A column of text data used as an object for the processing.
+        engine : str, optional
+            {auto|python|pandas} If 'python', applies all operations to every row in one pass, equal texts are processed only once.
+            If 'pandas', applies the operations one by one using vectorized pandas string methods
+            (Series.str.replace, .str.findall, .str.split and explode for tokens).
+            If 'auto', uses 'pandas' for one replacing operation on the whole texts or if string_dtype is given,
+            otherwise 'python' (default is 'auto')
+        string_dtype : str or None, optional
+            If given, the column is converted to this dtype before the 'pandas' engine,
+            e.g. 'string[pyarrow]' (default is None)
+
+        Returns
+        -------
+        pd.Series
+            А column with processed text
+        """
+        if engine == 'auto':
+            # splitting on tokens and findall on the object dtype are faster in one pass by python
+            simple = len(self._compiled) == 1 and self._compiled[0][0] == 'replace' and not self._compiled[0][3]
+            engine = 'pandas' if (simple or string_dtype) and self.vectorizable(text_col) else 'python'
+        if engine == 'pandas':
+            return self._apply_vectorized(text_col, string_dtype)
+
+        processed = {}
+        result = []
+        for string in text_col:
+            if isinstance(string, str):
+                if string not in processed:
+                    processed[string] = self.process(string)
+                result.append(processed[string])
+            else:
+                result.append(self.process(string))
+        return pd.Series(result, index=text_col.index, name=text_col.name)
+
+    @staticmethod
+    def _vector_op(text_col, op, regex, repl):
+        # applying the operation to the whole column by pandas string methods
+        if op == 'replace':
+            return text_col.str.replace(regex.pattern, repl, regex=True, flags=regex.flags & ~re.UNICODE)
+        return text_col.str.findall(regex.pattern, flags=regex.flags & ~re.UNICODE).str.join('')
+
+    def _apply_vectorized(self, text_col, string_dtype=None):
+        result = text_col if string_dtype is None else text_col.astype(string_dtype)
+
+        for op, regex, repl, sep_for_tokens in self._compiled:
+            if not sep_for_tokens:
+                result = self._vector_op(result, op, regex, repl)
+                continue
+
+            # processing every token as a separate row, explode keeps the tokens of a row contiguous
+            # the separator is a plain string, pandas treats multi-character patterns as regexps by default
+            tokens = result.reset_index(drop=True).str.split(sep_for_tokens, regex=False).explode()
+            tokens = self._vector_op(tokens, op, regex, repl)
+            keep = (tokens.notna() & (tokens != '')).to_numpy()
+
+            # joining non-empty results back by rows
+            joined = np.full(len(result), '', dtype=object)
+            positions, values = _join_groups(tokens.index.to_numpy()[keep], tokens.to_numpy(dtype=object)[keep], sep_for_tokens)
+            joined[positions] = values
+            isna = result.isna().to_numpy()
+            joined[isna] = result.to_numpy(dtype=object)[isna]
+            result = pd.Series(joined, index=result.index, name=result.name)
+
+        return result
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for caching parsed texts
+
+class DocCache:
+    """ Stores spacy Docs keyed by the text content and the pipeline configuration,
+    so every distinct string is parsed only once. The least recently used Docs are evicted
+    when the number of stored Docs exceeds the given bound.
+
+    Parameters
+    ----------
+    max_size : int or None, optional
+        The maximum number of stored Docs. If None, the number is unbounded (default is 100000)
+
+    Attributes
+    ----------
+    max_size : int or None
+        The maximum number of stored Docs.
+    hits : int
+        A number of Docs taken from the cache.
+    misses : int
+        A number of texts not found in the cache.
+    """
+
+    def __init__(self, max_size=100000):
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._docs = OrderedDict()
+
+    def __len__(self):
+        return len(self._docs)
+
+    @staticmethod
+    def config_key(nlp):
+        """ Returns the key of the pipeline configuration: the model object and its enabled components."""
+        return (id(nlp), tuple(nlp.pipe_names))
+
+    def get(self, config, text):
+        """ Returns the stored Doc for the given text or None and marks it as recently used."""
+        key = (config, text)
+        doc = self._docs.get(key)
+        if doc is None:
+            self.misses += 1
+            return None
+        self._docs.move_to_end(key)
+        self.hits += 1
+        return doc
+
+    def put(self, config, text, doc):
+        """ Stores the Doc for the given text evicting the least recently used Docs if needed."""
+        key = (config, text)
+        self._docs[key] = doc
+        self._docs.move_to_end(key)
+        if self.max_size is not None:
+            while len(self._docs) > self.max_size:
+                self._docs.popitem(last=False)
+
+    def clear(self):
+        """ Removes all stored Docs."""
+        self._docs.clear()
+
+    def info(self):
+        """ Returns the statistics of the cache usage as a dict."""
+        return {'size': len(self._docs), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for saving parsed texts to disk
+
+class DocBinCache:
+    """ Saves parsed spacy Docs to disk as sharded DocBin files and loads them lazily in later sessions.
+    Docs are keyed by the hash of the text and stored separately for every model (name, version and components).
+    The data serialized by DocBin (tokens, annotations, entities, spans, cats) and doc.tensor are restored.
+    The added Docs are kept in memory until a shard is full or the cache is closed,
+    and the index of the saved Docs is only appended to.
+
+    Parameters
+    ----------
+    path : str
+        A directory for the cache files.
+    shard_size : int, optional
+        A number of Docs saved in one shard file (default is 10000)
+    max_size : int or None, optional
+        The maximum size of the shard files of one model in megabytes.
+        If exceeded, the oldest shards are deleted. If None, the size is unbounded (default is None)
+
+    Attributes
+    ----------
+    path : str
+        A directory for the cache files.
+    shard_size : int
+        A number of Docs saved in one shard file.
+    max_size : int or None
+        The maximum size of the shard files of one model in megabytes.
+
+    Methods
+    -------
+    get_docs
+        Returns the saved Docs for the given texts, None for the texts which are not saved.
+    add_docs
+        Adds the Docs to the cache, full shards are written to disk at once.
+    flush
+        Writes all added Docs to disk.
+    close
+        Writes all added Docs to disk, it's also made when the cache is deleted.
+    invalidate
+        Deletes the saved Docs for the given texts, the given model or the whole cache.
+    """
+
+    def __init__(self, path, shard_size=10000, max_size=None):
+
+        self.path = path
+        self.shard_size = shard_size
+        self.max_size = max_size
+        self._indexes = {}
+        self._shards = OrderedDict()
+        self._pending = {}
+
+    @staticmethod
+    def model_key(nlp):
+        """ Returns the name of the cache directory for the given model."""
+        components = hashlib.sha1(','.join(nlp.pipe_names).encode()).hexdigest()[:8]
+        return f"{nlp.lang}_{nlp.meta.get('name', '')}-{nlp.meta.get('version', '')}_{components}"
+
+    @staticmethod
+    def text_key(text):
+        """ Returns the hash of the given text."""
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def _model_dir(self, nlp):
+        return os.path.join(self.path, self.model_key(nlp))
+
+    def _index(self, nlp=None, model_dir=None):
+        # the index binds text hashes with the shard name and the position in it,
+        # every line of index.jsonl adds [key, shard, position] or deletes [key, null, null]
+        if model_dir is None:
+            model_dir = self._model_dir(nlp)
+        if model_dir not in self._indexes:
+            index = {}
+            # the index of the previous versions saved as one dict
+            index_path = os.path.join(model_dir, 'index.json')
+            if os.path.exists(index_path):
+                with open(index_path, encoding='utf-8') as f:
+                    index.update(json.load(f))
+            log_path = os.path.join(model_dir, 'index.jsonl')
+            if os.path.exists(log_path):
+                with open(log_path, encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        key, shard, position = json.loads(line)
+                        if shard is None:
+                            index.pop(key, None)
+                        else:
+                            index[key] = [shard, position]
+            self._indexes[model_dir] = index
+        return self._indexes[model_dir]
+
+    def _append_index(self, model_dir, records):
+        # the records are appended to the index file instead of rewriting it
+        if not records or not os.path.isdir(model_dir):
+            return
+        with open(os.path.join(model_dir, 'index.jsonl'), 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+
+    def _load_shard(self, nlp, shard):
+        from spacy.tokens import DocBin
+
+        # only a few shards are kept in memory at the same time
+        shard_path = os.path.join(self._model_dir(nlp), shard)
+        if shard_path not in self._shards:
+            docs = list(DocBin().from_disk(shard_path).get_docs(nlp.vocab))
+            # DocBin doesn't save doc.tensor, the tensors are restored from the file next to the shard
+            tensors_path = shard_path.removesuffix('.spacy') + '.tensors.npz'
+            if os.path.exists(tensors_path):
+                with np.load(tensors_path) as data:
+                    tensors, lengths = data['tensors'], data['lengths']
+                starts = np.r_[0, np.cumsum(np.maximum(lengths, 0))[:-1]]
+                for doc, start, length in zip(docs, starts, lengths):
+                    if length >= 0:
+                        doc.tensor = tensors[start:start + length]
+            self._shards[shard_path] = docs
+            while len(self._shards) > 4:
+                self._shards.popitem(last=False)
+        self._shards.move_to_end(shard_path)
+        return self._shards[shard_path]
+
+    def get_docs(self, nlp, texts):
+        """ Returns the list of saved Docs for the given texts, None for the texts which are not saved."""
+        index = self._index(nlp)
+        pending = self._pending.get(self._model_dir(nlp), {})
+        result = []
+        for text in texts:
+            key = self.text_key(text)
+            if key in pending:
+                result.append(pending[key])
+            elif key in index:
+                shard, position = index[key]
+                try:
+                    result.append(self._load_shard(nlp, shard)[position])
+                except (OSError, ValueError, IndexError):
+                    result.append(None)
+            else:
+                result.append(None)
+        return result
+
+    def add_docs(self, nlp, texts, docs):
+        """ Adds the Docs parsed from the given texts to the cache, full shards are written to disk at once."""
+        model_dir = self._model_dir(nlp)
+        pending = self._pending.setdefault(model_dir, {})
+        for text, doc in zip(texts, docs):
+            pending[self.text_key(text)] = doc
+            if len(pending) >= self.shard_size:
+                self._write_shard(nlp)
+                pending = self._pending.setdefault(model_dir, {})
+
+    def flush(self):
+        """ Writes all added Docs to disk."""
+        for model_dir in list(self._pending):
+            if self._pending[model_dir]:
+                self._write_shard(model_dir=model_dir)
+
+    def close(self):
+        """ Writes all added Docs to disk."""
+        self.flush()
+
+    def __del__(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+    def _write_shard(self, nlp=None, model_dir=None):
+        from spacy.tokens import DocBin
+
+        if model_dir is None:
+            model_dir = self._model_dir(nlp)
+        pending = self._pending.pop(model_dir, {})
+        if not pending:
+            return
+        os.makedirs(model_dir, exist_ok=True)
+        index = self._index(model_dir=model_dir)
+
+        shard = f'shard_{time.time_ns()}.spacy'
+        db = DocBin(docs=pending.values())
+        db.to_disk(os.path.join(model_dir, shard))
+
+        # the tensors of all Docs are saved as one matrix with the number of rows of every Doc (-1 if no tensor)
+        tensors = [doc.tensor if getattr(doc.tensor, 'ndim', 0) == 2 else None for doc in pending.values()]
+        if any(tensor is not None and tensor.size for tensor in tensors):
+            lengths = np.array([len(tensor) if tensor is not None else -1 for tensor in tensors], dtype=np.int64)
+            np.savez(os.path.join(model_dir, shard.removesuffix('.spacy') + '.tensors.npz'),
+                     tensors=np.concatenate([tensor for tensor in tensors if tensor is not None]), lengths=lengths)
+
+        records = []
+        for position, key in enumerate(pending):
+            index[key] = [shard, position]
+            records.append([key, shard, position])
+        self._append_index(model_dir, records)
+        self._check_size(model_dir)
+
+    def _check_size(self, model_dir):
+        # deleting the oldest shards if the size of the model cache is exceeded
+        if self.max_size is None:
+            return
+        shards = sorted((f for f in os.listdir(model_dir) if f.endswith('.spacy')),
+                        key=lambda f: os.path.getmtime(os.path.join(model_dir, f)))
+        total = sum(os.path.getsize(os.path.join(model_dir, f)) for f in shards)
+        index = self._indexes.get(model_dir, {})
+
+        def tensors_path(shard):
+            return os.path.join(model_dir, shard.removesuffix('.spacy') + '.tensors.npz')
+
+        total += sum(os.path.getsize(tensors_path(f)) for f in shards if os.path.exists(tensors_path(f)))
+        while shards and total > self.max_size * 1024 ** 2:
+            shard = shards.pop(0)
+            shard_path = os.path.join(model_dir, shard)
+            total -= os.path.getsize(shard_path)
+            os.remove(shard_path)
+            if os.path.exists(tensors_path(shard)):
+                total -= os.path.getsize(tensors_path(shard))
+                os.remove(tensors_path(shard))
+            self._shards.pop(shard_path, None)
+            deleted = [k for k, v in index.items() if v[0] == shard]
+            for key in deleted:
+                del index[key]
+            self._append_index(model_dir, [[key, None, None] for key in deleted])
+
+    def invalidate(self, nlp=None, texts=None):
+        """ Deletes the saved Docs.
+
+        Parameters
+        ----------
+        nlp : spacy model class, optional
+            If given, deletes only the Docs of this model, otherwise deletes the whole cache (default is None)
+        texts : list, tuple, pd.Series or None, optional
+            If given with 'nlp', deletes only the Docs of these texts (default is None)
+        """
+        if nlp is None:
+            self._indexes.clear()
+            self._shards.clear()
+            self._pending.clear()
+            if os.path.isdir(self.path):
+                shutil.rmtree(self.path)
+            return
+
+        model_dir = self._model_dir(nlp)
+        if texts is None:
+            self._indexes.pop(model_dir, None)
+            self._pending.pop(model_dir, None)
+            for shard_path in [p for p in self._shards if p.startswith(model_dir)]:
+                del self._shards[shard_path]
+            if os.path.isdir(model_dir):
+                shutil.rmtree(model_dir)
+            return
+
+        index = self._index(nlp)
+        pending = self._pending.get(model_dir, {})
+        deleted = []
+        for text in texts:
+            key = self.text_key(text)
+            if index.pop(key, None) is not None:
+                deleted.append([key, None, None])
+            pending.pop(key, None)
+        self._append_index(model_dir, deleted)
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for searching all patterns of the dict in one pass
+
+class PatternMatcher:
+    """ Compiles all patterns of the dict binding categories and patterns into one regular expression
+    built as a prefix tree, so every text is scanned only once for all patterns of all categories.
+    Patterns are searched as whole words ignoring case like r'\\b{pattern}\\b'.
+
+    Parameters
+    ----------
+    dict_df : pd.DataFrame
+        Dataframe with the dict binding categories and patterns (columns 'categories' and 'patterns').
+
+    Attributes
+    ----------
+    patterns : list
+        The patterns of the dict in the original order.
+    categories : list
+        The categories of the corresponding patterns.
+
+    Methods
+    -------
+    find
+        Returns the sorted positions of all patterns found in the text.
+    hit_matrix
+        Builds the sparse matrix of the found patterns.
+    """
+
+    _WORD = re.compile(r'\w')
+
+    def __init__(self, dict_df):
+
+        dict_df = dict_df[dict_df['patterns'].notna() & (dict_df['patterns'] != '')]
+        self.patterns = [str(pattern) for pattern in dict_df['patterns']]
+        self.categories = list(dict_df['categories'])
+
+        # binding lowercased patterns with their positions in the dict
+        self._positions = {}
+        for i, pattern in enumerate(self.patterns):
+            self._positions.setdefault(pattern.lower(), []).append(i)
+
+        # the longest pattern found at a position contains all shorter ones found there as prefixes
+        self._prefixes = {}
+        for key in self._positions:
+            self._prefixes[key] = [key[:k] for k in range(1, len(key))
+                                   if key[:k] in self._positions and self._is_boundary(key, k)]
+
+        if self._positions:
+            self._regex = re.compile(rf'(?=\b({self._trie_regex(self._positions)})\b)', re.IGNORECASE)
+        else:
+            self._regex = None
+
+    def _is_boundary(self, string, k):
+        # checks the condition of r'\b' between string[k - 1] and string[k]
+        return bool(self._WORD.match(string[k - 1])) != bool(self._WORD.match(string[k]))
+
+    @staticmethod
+    def _trie_regex(words):
+        # builds the regular expression where patterns with a common prefix share the branch
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def _build(node):
+            branches = [re.escape(char) + _build(child) for char, child in node.items() if char != '']
+            if not branches:
+                return ''
+            if len(branches) == 1 and '' not in node:
+                return branches[0]
+            regex = '(?:' + '|'.join(branches) + ')'
+            if '' in node:
+                regex += '?'
+            return regex
+
+        return _build(trie)
+
+    def find(self, text):
+        """ Returns the sorted list of positions of the dict patterns found in the given text."""
+        if self._regex is None or not isinstance(text, str):
+            return []
+        found = set()
+        for match in self._regex.finditer(text):
+            key = match.group(1).lower()
+            if key in self._positions:
+                found.add(key)
+                found.update(self._prefixes[key])
+        return sorted(i for key in found for i in self._positions[key])
+
+    def hit_matrix(self, hits, index):
+        """ Builds the sparse matrix of the found patterns.
+
+        Parameters
+        ----------
+        hits : list
+            The lists of positions of the found patterns for every text returned by self.find.
+        index : pd.Index
+            An index of the texts.
+
+        Returns
+        -------
+        PatternHits
+            The result of the search as a sparse (text x pattern) matrix.
+        """
+        from scipy import sparse
+
+        indptr = np.zeros(len(hits) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(positions) for positions in hits])
+        indices = np.fromiter((i for positions in hits for i in positions), dtype=np.int32, count=indptr[-1])
+        matrix = sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr),
+                                   shape=(len(hits), len(self.patterns)))
+        return PatternHits(matrix, self.patterns, self.categories, index)
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for the result of the pattern search
+
+class PatternHits:
+    """ Keeps the found patterns as a sparse (text x pattern) CSR matrix of hits.
+    Dense and string views are built only on request.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse.csr_matrix
+        The matrix where 1 means that the pattern (column) is found in the text (row).
+    patterns : list
+        The patterns corresponding the columns of the matrix.
+    categories : list
+        The categories of the corresponding patterns.
+    index : pd.Index
+        An index of the texts corresponding the rows of the matrix.
+
+    Attributes
+    ----------
+    matrix : scipy.sparse.csr_matrix
+        The matrix of hits.
+    patterns : list
+        The patterns corresponding the columns of the matrix.
+    categories : list
+        The categories of the corresponding patterns.
+    index : pd.Index
+        An index of the texts.
+
+    Methods
+    -------
+    by_category
+        Returns the sparse (text x category) matrix with quantities of the found patterns.
+    to_frame
+        Builds the dense DataFrame for the categories.
+    """
+
+    def __init__(self, matrix, patterns, categories, index):
+
+        self.matrix = matrix
+        self.patterns = patterns
+        self.categories = categories
+        self.index = index
+
+    def _categories(self, categories=None):
+        if categories is None:
+            categories = list(dict.fromkeys(self.categories))
+        return list(categories)
+
+    def by_category(self, categories=None):
+        """ Returns the sparse (text x category) matrix with quantities of the found patterns.
+
+        Parameters
+        ----------
+        categories : list or None, optional
+            The categories for the columns. If None, all categories of the dict are used(default is None).
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+        """
+        from scipy import sparse
+
+        categories = self._categories(categories)
+        cat_index = {cat: j for j, cat in enumerate(categories)}
+
+        # (pattern x category) binding matrix, patterns of other categories are skipped
+        rows = [i for i, cat in enumerate(self.categories) if cat in cat_index]
+        cols = [cat_index[self.categories[i]] for i in rows]
+        binding = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                    shape=(len(self.patterns), len(categories)))
+        return (self.matrix @ binding).tocsr()
+
+    def to_frame(self, mode='quantity', categories=None):
+        """ Builds the dense DataFrame for the categories.
+
+        Parameters
+        ----------
+        mode : str, optional
+            {binary|patterns|quantity} If 'binary', puts bool values into the result columns.
+            If 'patterns', puts the found patterns separated by commas in the result columns.
+            If 'quantity', puts quantity of the found patterns into the result columns(default is 'quantity').
+        categories : list or None, optional
+            The categories for the result columns. If None, all categories of the dict are used(default is None).
+
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame with the columns corresponding the names of categories.
+        """
+        categories = self._categories(categories)
+
+        if mode == 'patterns':
+            cat_index = {cat: j for j, cat in enumerate(categories)}
+            columns = [[''] * self.matrix.shape[0] for _ in categories]
+            indptr, indices = self.matrix.indptr, self.matrix.indices
+            for row in range(self.matrix.shape[0]):
+                found = {}
+                for i in indices[indptr[row]:indptr[row + 1]]:
+                    j = cat_index.get(self.categories[i])
+                    if j is not None:
+                        found.setdefault(j, []).append(self.patterns[i])
+                for j, patterns in found.items():
+                    columns[j][row] = ','.join(patterns)
+            return pd.DataFrame(dict(zip(categories, columns)), index=self.index)
+
+        quantity = self.by_category(categories).toarray().astype(np.int64)
+        if mode == 'binary':
+            return pd.DataFrame(quantity > 0, index=self.index, columns=categories)
+        return pd.DataFrame(quantity, index=self.index, columns=categories)
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for counting quotes of patterns
+
+class QuotingIndex:
+    """ Inverted index of words (case folded r'\\w+' tokens) of a text column built once per column.
+    Every pattern is searched like r'\\b{pattern}\\b' only in the rows containing all its words,
+    so counting quotes for thousands of patterns doesn't scan the whole column for every pattern.
+
+    Parameters
+    ----------
+    text_col : pd.Series
+        A column of text data used as an object for the quoting calculation.
+
+    Attributes
+    ----------
+    text_col : pd.Series
+        A column of text data used for building the index.
+    n_rows : int
+        A number of rows with text data (NaN rows are not counted).
+
+    Methods
+    -------
+    rows
+        Returns the positions of the rows containing the pattern.
+    count
+        Returns the number of the rows containing the pattern.
+    ratio
+        Returns the ratio of the rows containing the pattern.
+    """
+
+    _TOKEN = re.compile(r'\w+')
+
+    # the words are folded like re.IGNORECASE compares characters: by the simple lowercase mapping
+    # ('İ'.lower() gives 2 characters, but re matches 'İ' with 'i') and the extra equivalences of re ('ſ' and 's', ...)
+    _FOLD_BEFORE = {0x130: 'i'}
+    _FOLD_AFTER = None
+
+    @classmethod
+    def fold(cls, word):
+        """ Returns the word folded so that the words equal with re.IGNORECASE are equal."""
+        if cls._FOLD_AFTER is None:
+            try:
+                from re._casefix import _EXTRA_CASES
+            except ImportError:
+                _EXTRA_CASES = {}
+            cls._FOLD_AFTER = {}
+            for lower, others in _EXTRA_CASES.items():
+                chars = {chr(code).lower() for code in (lower, *others)}
+                for char in chars:
+                    if char != min(chars):
+                        cls._FOLD_AFTER[ord(char)] = min(chars)
+        return word.translate(cls._FOLD_BEFORE).lower().translate(cls._FOLD_AFTER)
+
+    def __init__(self, text_col):
+
+        self.text_col = text_col
+        self._texts = list(text_col)
+        self.n_rows = 0
+
+        postings = {}
+        for row, text in enumerate(self._texts):
+            if not isinstance(text, str):
+                continue
+            self.n_rows += 1
+            for token in {self.fold(token) for token in set(self._TOKEN.findall(text))}:
+                postings.setdefault(token, []).append(row)
+        self._postings = {token: np.array(rows, dtype=np.int64) for token, rows in postings.items()}
+        self._all_rows = np.array([row for row, text in enumerate(self._texts) if isinstance(text, str)], dtype=np.int64)
+
+    def rows(self, pattern, case=False):
+        """ Returns the positions of the rows containing the pattern.
+
+        Parameters
+        ----------
+        pattern : str
+            A pattern searched as a whole word or phrase.
+        case : bool, optional
+            If True, the search is case sensitive(default is False).
+
+        Returns
+        -------
+        np.ndarray
+        """
+        tokens = [self.fold(token) for token in self._TOKEN.findall(pattern)]
+
+        # every word of the pattern is a whole word in the matched text
+        if tokens:
+            candidates = None
+            for token in sorted(set(tokens), key=lambda t: len(self._postings.get(t, ()))):
+                posting = self._postings.get(token)
+                if posting is None:
+                    return np.array([], dtype=np.int64)
+                candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+                if not len(candidates):
+                    return candidates
+            # a single word is found exactly by the index
+            if not case and len(tokens) == 1 and self._TOKEN.fullmatch(pattern):
+                return candidates
+        else:
+            candidates = self._all_rows
+
+        regex = re.compile(rf'\b{re.escape(pattern)}\b', 0 if case else re.IGNORECASE)
+        return np.array([row for row in candidates if regex.search(self._texts[row])], dtype=np.int64)
+
+    def count(self, pattern, case=False):
+        """ Returns the number of the rows containing the pattern."""
+        return len(self.rows(pattern, case))
+
+    def ratio(self, pattern, case=False):
+        """ Returns the ratio of the rows containing the pattern to the number of the rows with text data."""
+        if not self.n_rows:
+            return np.nan
+        return self.count(pattern, case) / self.n_rows
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for storing vectors of tokens in one matrix
+
+class VectorStore:
+    """ Keeps vectors of tokens as one contiguous float32 (token x dimension) matrix
+    with a dict from a token to its row. The matrix can be memory-mapped from a .npy file.
+
+    Parameters
+    ----------
+    keys : list
+        The tokens corresponding the rows of the matrix.
+    matrix : np.ndarray
+        The matrix of vectors, it is converted to float32 if it has another dtype.
+
+    Attributes
+    ----------
+    keys : list
+        The tokens corresponding the rows of the matrix.
+    matrix : np.ndarray or np.memmap
+        The matrix of vectors. Slices of it are views without copying.
+    index : dict
+        The row of every token (the first one for repeated tokens).
+
+    Methods
+    -------
+    from_vectors
+        Builds the store from an iterable of vectors, optionally writing the matrix to disk.
+    load
+        Opens the store saved by the method save, the matrix is memory-mapped by default.
+    save
+        Saves the matrix to a .npy file and the tokens to a .json file near it.
+    rows
+        Returns the rows of the given tokens.
+    vectors
+        Returns the matrix of the given tokens.
+    to_series
+        Returns the vectors as pd.Series where the tokens are an index.
+    """
+
+    def __init__(self, keys, matrix):
+
+        self.keys = list(keys)
+        self.matrix = matrix if isinstance(matrix, np.memmap) or matrix.dtype == np.float32 else matrix.astype(np.float32)
+        self.index = {}
+        for row, key in enumerate(self.keys):
+            self.index.setdefault(key, row)
+
+    @classmethod
+    def from_vectors(cls, keys, vectors, dim, path=None):
+        """ Builds the store from an iterable of vectors.
+
+        Parameters
+        ----------
+        keys : list
+            The tokens corresponding the vectors.
+        vectors : iterable
+            The vectors of the tokens (one dimensional arrays of the length dim).
+        dim : int
+            A dimension of the vectors.
+        path : str or None, optional
+            If given, the matrix is written to this .npy file and memory-mapped (default is None)
+
+        Returns
+        -------
+        VectorStore
+        """
+        keys = list(keys)
+        if path is None and isinstance(vectors, np.ndarray) and vectors.shape == (len(keys), dim):
+            return cls(keys, vectors)
+        if path:
+            matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(keys), dim))
+        else:
+            matrix = np.empty((len(keys), dim), dtype=np.float32)
+        for row, vector in enumerate(vectors):
+            matrix[row] = vector
+
+        store = cls(keys, matrix)
+        if path:
+            store.save(path)
+        return store
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """ Opens the store saved by the method save, the matrix is memory-mapped if mmap_mode is given (default is 'r')."""
+        with open(cls._keys_path(path), encoding='utf-8') as f:
+            keys = json.load(f)
+        return cls(keys, np.load(path, mmap_mode=mmap_mode))
+
+    @staticmethod
+    def _keys_path(path):
+        return os.path.splitext(path)[0] + '.json'
+
+    def save(self, path):
+        """ Saves the matrix to a .npy file and the tokens to a .json file with the same name."""
+        if isinstance(self.matrix, np.memmap) and os.path.abspath(self.matrix.filename) == os.path.abspath(path):
+            self.matrix.flush()
+        else:
+            np.save(path, self.matrix)
+        with open(self._keys_path(path), 'w', encoding='utf-8') as f:
+            json.dump([key if isinstance(key, str) else None for key in self.keys], f, ensure_ascii=False)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __getitem__(self, key):
+        return self.matrix[self.index[key]]
+
+    def rows(self, keys):
+        """ Returns np.ndarray with the rows of the given tokens, -1 for the tokens which are not in the store."""
+        return np.fromiter((self.index.get(key, -1) for key in keys), dtype=np.int64)
+
+    def vectors(self, keys=None):
+        """ Returns the matrix of the given tokens (the whole matrix without copying if keys is None)."""
+        if keys is None:
+            return self.matrix
+        keys = list(keys)
+        rows = self.rows(keys)
+        if (rows < 0).any():
+            raise KeyError(f'Tokens are not in the store: {[key for key, row in zip(keys, rows) if row < 0][:10]}')
+        return self.matrix[rows]
+
+    def to_series(self):
+        """ Returns pd.Series where the tokens are an index and the rows of the matrix (views) are values."""
+        return pd.Series(list(self.matrix), index=pd.Index(self.keys, name='text_col'), name='vectors', dtype=object)
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for keeping results of the incremental processing
+
+class ResultStore:
+    """ Keeps the results of TextPreprocessing methods by the row keys (a row id or a content hash)
+    together with the hashes of the processed texts, so only new or changed rows are processed again.
+    If the path is given, the store is loaded from and saved to this pickle file.
+
+    Parameters
+    ----------
+    path : str or None, optional
+        A path of the pickle file (default is None)
+
+    Attributes
+    ----------
+    path : str or None
+        A path of the pickle file.
+    results : dict
+        The entries {'hashes': pd.Series, 'result': pd.Series or pd.DataFrame} for every method signature,
+        both are indexed by the row keys.
+
+    Methods
+    -------
+    get
+        Returns the entry for the given signature or None.
+    merge
+        Replaces the results of the given keys and adds the new ones.
+    save
+        Saves the store to the pickle file.
+    clear
+        Deletes the entry for the given signature or all entries.
+    """
 
-import time
+    def __init__(self, path=None):
+
+        self.path = path
+        self.results = pd.read_pickle(path) if path and os.path.exists(path) else {}
+
+    def get(self, signature):
+        """ Returns the entry for the given signature or None."""
+        return self.results.get(signature)
+
+    def merge(self, signature, hashes, result):
+        """ Replaces the results of the given keys and adds the new ones.
+
+        Parameters
+        ----------
+        signature : str
+            The signature of the method and its parameters.
+        hashes : pd.Series
+            The hashes of the processed texts indexed by the row keys.
+        result : pd.Series or pd.DataFrame
+            The results of the processed texts indexed by the row keys.
+        """
+        entry = self.results.get(signature)
+        if entry is not None:
+            hashes = pd.concat([entry['hashes'].drop(hashes.index, errors='ignore'), hashes])
+            result = pd.concat([entry['result'].drop(result.index, errors='ignore'), result])
+        self.results[signature] = {'hashes': hashes, 'result': result}
+
+    def save(self):
+        """ Saves the store to the pickle file if the path is given."""
+        if self.path:
+            pd.to_pickle(self.results, self.path)
+
+    def clear(self, signature=None):
+        """ Deletes the entry for the given signature, all entries if None."""
+        if signature is None:
+            self.results = {}
+        else:
+            self.results.pop(signature, None)
+        self.save()
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for the versions of the modified text column
+
+class TextVersions:
+    """ Keeps the current version of the text column and a bounded history of changes for rolling back.
+    A new version shares the string objects of the unchanged rows with the previous one,
+    and the history keeps only the previous values of the changed rows.
+
+    Parameters
+    ----------
+    text_col : pd.Series
+        The initial version of the column. Only the array of references is copied, the strings are shared.
+    max_history : int, optional
+        The maximum number of changes which can be rolled back, 0 disables the history (default is 5)
+
+    Attributes
+    ----------
+    current : pd.Series
+        The current version of the column.
+    max_history : int
+        The maximum number of changes which can be rolled back.
+
+    Methods
+    -------
+    commit
+        Makes the given column the current version and saves the change into the history.
+    rollback
+        Restores the version before the given number of changes.
+    history
+        Returns the descriptions of the changes which can be rolled back.
+    """
+
+    def __init__(self, text_col, max_history=5):
+
+        self.max_history = max_history
+        self.current = pd.Series(text_col.to_numpy(dtype=object, copy=True), index=text_col.index, name=text_col.name)
+        self._history = []
+
+    def commit(self, text_col, message=''):
+        """ Makes the given column the current version and saves the change into the history.
+            If the index isn't changed, the values of the unchanged rows are taken from the previous version.
+
+        Returns
+        -------
+        pd.Series
+            The new current version.
+        """
+        previous = self.current
+        if text_col.index.equals(previous.index):
+            old = previous.to_numpy(dtype=object)
+            new = text_col.to_numpy(dtype=object)
+            old_isna = pd.isna(old)
+            changed = np.flatnonzero((old_isna != pd.isna(new)) | (~old_isna & (old != new)))
+            values = old.copy()
+            values[changed] = new[changed]
+            self.current = pd.Series(values, index=previous.index, name=text_col.name)
+            undo = (changed, old[changed], previous.name)
+        else:
+            self.current = pd.Series(text_col.to_numpy(dtype=object, copy=True), index=text_col.index, name=text_col.name)
+            undo = previous
+
+        if self.max_history:
+            self._history.append((message, undo))
+            del self._history[:-self.max_history]
+        return self.current
+
+    def rollback(self, steps=1):
+        """ Restores the version before the given number of changes and returns it."""
+        if steps > len(self._history):
+            raise ValueError(f'Only {len(self._history)} changes can be rolled back')
+
+        for _ in range(steps):
+            message, undo = self._history.pop()
+            if isinstance(undo, pd.Series):
+                self.current = undo
+            else:
+                changed, old, name = undo
+                values = self.current.to_numpy(dtype=object, copy=True)
+                values[changed] = old
+                self.current = pd.Series(values, index=self.current.index, name=name)
+        return self.current
+
+    def history(self):
+        """ Returns pd.DataFrame with the descriptions of the changes which can be rolled back and the numbers of the changed rows."""
+        return pd.DataFrame([(message, len(undo) if isinstance(undo, pd.Series) else len(undo[0]))
+                             for message, undo in self._history], columns=['operation', 'changed_rows'])
+
+### ------------------------------------------------------------------------------------------
 
-import ipywidgets as widgets
-from ipywidgets import IntProgress, Label
-from IPython.display import display
+# functions for the sharded processing in worker processes (they must be picklable)
+
+_WORKER_TP = None
+
+def _init_shard_worker(nlp, batch_size, cache_size, prune_pipes=True):
+    # the model is loaded only once for every worker process
+    global _WORKER_TP
+    _WORKER_TP = TextPreprocessing(pd.Series([], dtype=object), nlp, batch_size=batch_size, cache_size=cache_size,
+                                   progress=None, prune_pipes=prune_pipes)
+
+def _run_shard(method, chunk, kwargs):
+    # applies the method of TextPreprocessing to the chunk of the text column
+    return getattr(_WORKER_TP, method)(text_col=chunk, aliquot=None, **kwargs)
+
+### ------------------------------------------------------------------------------------------
 
 # defining a class for nlp-textprocessing
 
@@ -33,15 +1373,56 @@ class TextPreprocessing:
         A list of text data used as an object for the processing.
     nlp : spacy model class
         Model for the specified language used for process.
+    batch_size : int, optional
+        A number of texts buffered by nlp.pipe for the processing in one batch (default is 1000)
+    n_process : int, optional
+        A number of processes used by nlp.pipe, -1 means all available CPU (default is 1)
+    cache_size : int or None, optional
+        The maximum number of parsed Docs kept in self.doc_cache between operations.
+        If 0, parsed Docs are not cached; if None, the cache is unbounded (default is 100000)
+    disk_cache : str, DocBinCache or None, optional
+        If given, parsed Docs are saved to this directory (or DocBinCache) and loaded from it in later sessions
+        instead of the repeated processing (default is None)
+    progress : str, ProgressBar subclass or None, optional
+        {widget|tqdm|log} A backend of progress indicators: ipywidgets in Jupyter notebooks,
+        tqdm in the console or messages in the log. If None, indicators are not shown (default is 'widget')
+    result_store : str, ResultStore or None, optional
+        The store of results for the method incremental. If str, the store is loaded from and saved to this pickle file.
+        If None, the results are kept in memory (default is None)
+    history_size : int, optional
+        The maximum number of changes of self.textcol_mod which can be rolled back (default is 5)
+    prune_pipes : bool, optional
+        If True, clear_from_label, extract_ents, extract_cats and vect run only the pipeline components
+        assigning the annotations they need (default is True)
 
     Attributes
     ----------
     nlp : spacy model class
         Model for the specified language using for process.
+    batch_size : int
+        A number of texts buffered by nlp.pipe for the processing in one batch
+    n_process : int
+        A number of processes used by nlp.pipe
+    prune_pipes : bool
+        If True, the methods run only the pipeline components they need
+    doc_cache : DocCache or None
+        The store of parsed Docs shared by all operations. It is cleared when self.textcol_mod is changed
+    disk_cache : DocBinCache or None
+        The persistent store of parsed Docs. Use self.disk_cache.close() to write the last Docs
+        and self.disk_cache.invalidate() to delete it
+    progress : str, ProgressBar subclass or None
+        A backend of progress indicators
+    result_store : ResultStore
+        The results of the previous incremental runs
+    dedup_stats : dict or None
+        The numbers of rows and distinct texts and the dedup ratio of the last run with dedup=True
     text_col : pd.Series
         A list of text data used as an object for the processing.
     textcol_mod : pd.Series
-        A copy of text data used for saving intermediate results.
+        A copy of text data used for saving intermediate results (the current version of self.versions).
+        The strings of the rows unchanged by an operation are shared with the previous version.
+    versions : TextVersions
+        The versions of self.textcol_mod with the bounded history of changes
     unique_tokens : pd.Series
         A list of unique tokens extracted from source texts
     LABELS_LIST_RU : list
@@ -63,11 +1444,16 @@ class TextPreprocessing:
     replace
         Applies replacement using regexp to every part of the text, separated with
         the given delimiter, in every row of the given column
+    clean
+        Applies the chain of replace and extract operations (CleaningPipeline)
+        to every row of the given column in one pass
+    rollback
+        Restores self.textcol_mod before the given number of changes
     
     get_uniquetokens
         Extracts a set of unique tokens (words or phrases) from the given column. 
         If attributes 'regexp' and 'repl' are given, it applies them for replacement
-        operations to extracted unique tokens joined as an entire text.
+        operations to every distinct token.
     clear_from_label
         Deletes from text data the named entities specified by the parameter 'labels'.
         Named entities can be the certain groups of patterns joined by similar meaning
@@ -89,17 +1475,35 @@ class TextPreprocessing:
     map_all
         Maps text data in the given column and ALL categories in the special dict.
         Puts the result in the separate columns with the names of categories which are in the dict.
+    incremental
+        Runs clear_from_label, extract_ents or map_all only for new or changed rows
+        and merges their results with the stored ones.
     quoting_stats
         Calculates quoting statistics for the given pattern list.
+    pipeline_report
+        Measures the speedup of parsing with the pipeline components needed for every method.
     nlp_processing
         Applies nlp-processing to text data in the given column.
     """
 
-    def __init__(self, text_col, nlp):
+    def __init__(self, text_col, nlp, batch_size=1000, n_process=1, cache_size=100000, disk_cache=None,
+                 progress='widget', result_store=None, history_size=5, prune_pipes=True):
         
         self.nlp = nlp
+        self.progress = progress
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.prune_pipes = prune_pipes
+        self.doc_cache = DocCache(cache_size) if cache_size != 0 else None
+        if isinstance(disk_cache, str):
+            disk_cache = DocBinCache(disk_cache)
+        self.disk_cache = disk_cache
+        if isinstance(result_store, str):
+            result_store = ResultStore(result_store)
+        self.result_store = result_store if result_store is not None else ResultStore()
+        self.dedup_stats = None
         self.text_col = text_col
-        self.textcol_mod = self.text_col.copy()
+        self.versions = TextVersions(self.text_col, history_size)
         self.LABELS_LIST_RU = ['ORG', 'PER', 'LOC']
 
         self.LABELS_LIST_EN = ['CARDINAL', 'DATE', 'EVENT', 'FAC', 'GPE', 'LANGUAGE', 'LAW',
@@ -126,7 +1530,7 @@ class TextPreprocessing:
     ### ------------------------------------------------------------------------------
     
     ### for text modification in the column
-    def replace(self, regexp, text_col=None, update=True, repl='', sep_for_tokens=''):
+    def replace(self, regexp, text_col=None, update=True, repl='', sep_for_tokens='', engine='auto', string_dtype=None):
         """Applies replacement using regexp to every part of the text, separated with given delimiter, in every row of the given column
             
         Parameters
@@ -142,38 +1546,27 @@ class TextPreprocessing:
         sep_for_tokens : str, optional
             A delimiter for separating the text on the several parts and then using them for individual processing (replacing operation)
             If '', the whole text is used to process (default is '')
+        engine : str, optional
+            {auto|python|pandas} If 'pandas', uses vectorized pandas string methods, if 'python', processes the rows one by one.
+            If 'auto', uses 'pandas' if sep_for_tokens is '' or string_dtype is given and all values are strings or NaN (default is 'auto')
+        string_dtype : str or None, optional
+            If given, the column is converted to this dtype for the 'pandas' engine, e.g. 'string[pyarrow]' (default is None)
             
         Returns
         -------
         pd.Series
             А column with processed text
         """
-        def _replace_(string, regexp, repl, sep_for_tokens):
-            if pd.isna(string):
-                return string
-            if sep_for_tokens:
-                lst = str(string).split(sep_for_tokens)
-            else:
-                lst = [string]
-            #
-            result = []
-            for elem in lst:
-                proc_res = re.sub(regexp, repl, elem)
-                if proc_res:
-                    result.append(proc_res)
-            result = sep_for_tokens.join(result)
-            return result
- 
         if isinstance(text_col, (list, tuple, pd.Series)):
             if isinstance(text_col, (list, tuple)):
                 text_col = pd.Series(text_col)
         else:
             text_col = self.textcol_mod
         
-        result = text_col.apply(_replace_, args=(regexp, repl, sep_for_tokens))
+        result = CleaningPipeline().replace(regexp, repl, sep_for_tokens).apply(text_col, engine, string_dtype)
         
         if update:
-            self.textcol_mod = result
+            result = self._update_textcol_mod(result, f'replace {regexp!r} with {repl!r}')
             
         return result
         
@@ -182,7 +1575,7 @@ class TextPreprocessing:
 
 
     ### for text modification in the column
-    def extract(self, regexp, text_col=None, update=True, sep_for_tokens=''):
+    def extract(self, regexp, text_col=None, update=True, sep_for_tokens='', engine='auto', string_dtype=None):
         """Applies extraction operation using regexp to every part of the text, separated with given delimiter, in every row of the given column
             
         Parameters
@@ -196,49 +1589,122 @@ class TextPreprocessing:
         sep_for_tokens : str, optional
             A delimiter for separating the text on the several parts and then using them for individual processing (replacing operation)
             if '', the whole text is used to process(default is '')
+        engine : str, optional
+            {auto|python|pandas} If 'pandas', uses vectorized pandas string methods, if 'python', processes the rows one by one.
+            If 'auto', uses 'pandas' if string_dtype is given, all values are strings or NaN and the regexp has no groups (default is 'auto')
+        string_dtype : str or None, optional
+            If given, the column is converted to this dtype for the 'pandas' engine, e.g. 'string[pyarrow]' (default is None)
             
         Returns
         -------
         pd.Series
             А column with processed text
         """
-        ## func for text extration
-        def _extract_(string, regexp, sep_for_tokens=''):
-            if pd.isna(string):
-                return string
-                
-            if sep_for_tokens:
-                lst = str(string).split(sep_for_tokens)
-            else:
-                lst = [string]
-                
-            result = []
-            for elem in lst:
-                proc_res = ''.join(re.findall(regexp, elem))
-                if proc_res:
-                    result.append(proc_res)
-            result = sep_for_tokens.join(result)
-            return result
-            
         if isinstance(text_col, (list, tuple, pd.Series)):
             if isinstance(text_col, (list, tuple)):
                 text_col = pd.Series(text_col)
         else:
             text_col = self.textcol_mod
                 
-        result = text_col.apply(_extract_, args=(regexp, sep_for_tokens))
+        result = CleaningPipeline().extract(regexp, sep_for_tokens).apply(text_col, engine, string_dtype)
         
         if update:
-            self.textcol_mod = result
+            result = self._update_textcol_mod(result, f'extract {regexp!r}')
+        return result
+
+    ### ------------------------------------------------------------------------------
+
+    ### for text modification in the column by the chain of operations
+    def clean(self, pipeline, text_col=None, update=True, engine='python', string_dtype=None):
+        """Applies the chain of replace and extract operations to every row of the given column in one pass
+            
+        Parameters
+        ----------
+        pipeline : CleaningPipeline or list
+            The pipeline of operations or the list of steps for CleaningPipeline
+            like [{'op': 'replace', 'regexp': r'\\d+', 'repl': ' '}, {'op': 'extract', 'regexp': r'\\w+', 'sep_for_tokens': ','}]
+        text_col : list, tuple, pd.Series or None, optional
+            If given, it is used as an object for the operations; if None, self.textcol_mod is used (default is None)
+        update : bool, optional
+            If True, rewrites self.textcol_mod with the result once after all operations (default is True)
+        engine : str, optional
+            {python|pandas|auto} If 'python', applies all operations to every row in one pass.
+            If 'pandas', applies the operations one by one using vectorized pandas string methods (default is 'python')
+        string_dtype : str or None, optional
+            If given, the column is converted to this dtype for the 'pandas' engine, e.g. 'string[pyarrow]' (default is None)
+            
+        Returns
+        -------
+        pd.Series
+            А column with processed text
+        """
+        if not isinstance(pipeline, CleaningPipeline):
+            pipeline = CleaningPipeline(pipeline)
+
+        if isinstance(text_col, (list, tuple, pd.Series)):
+            if isinstance(text_col, (list, tuple)):
+                text_col = pd.Series(text_col)
+        else:
+            text_col = self.textcol_mod
+
+        result = pipeline.apply(text_col, engine, string_dtype)
+
+        if update:
+            result = self._update_textcol_mod(result, f'clean ({len(pipeline)} steps)')
+        return result
+
+    ### ------------------------------------------------------------------------------
+
+    @property
+    def textcol_mod(self):
+        return self.versions.current
+
+    @textcol_mod.setter
+    def textcol_mod(self, textcol_mod):
+        self._update_textcol_mod(textcol_mod, 'assignment')
+
+    def rollback(self, steps=1):
+        """ Restores self.textcol_mod before the given number of changes (replace, extract, clean or assignment).
+            Use self.versions.history() to see the changes which can be rolled back.
+
+        Parameters
+        ----------
+        steps : int, optional
+            A number of the rolled back changes (default is 1)
+
+        Returns
+        -------
+        pd.Series
+            The restored column.
+        """
+        result = self.versions.rollback(steps)
+        self._invalidate_parsed()
+        return result
+
+    def _update_textcol_mod(self, textcol_mod, message=''):
+        """ Rewrites self.textcol_mod and invalidates the data parsed from its previous version.
+            Returns the new version which shares the unchanged strings with the previous one."""
+        result = self.versions.commit(textcol_mod, message)
+        self._invalidate_parsed()
         return result
 
+    def _invalidate_parsed(self):
+        if self.doc_cache is not None:
+            self.doc_cache.clear()
+        if hasattr(self, 'word_extractor_nlp'):
+            del self.word_extractor_nlp
+        self._quoting_index = None
+
     ### ------------------------------------------------------------------------------
     
     ### getting list of unique patterns from column of texts
     def get_uniquetokens(self, text_col=None, update=True, sep=',', regexp=None, repl=None):
 
-        """ Extracts a set of unique tokens (words or phrases) from the given column. 
-            If attributes 'regexp' and 'repl' are given, it applies them for replacement operations to extracted unique tokens joined as an entire text.
+        """ Extracts a set of unique tokens (words or phrases) from the given column in the order of the first occurrence.
+            The rows are split and deduplicated one by one, so the column is never joined into one entire text.
+            If attributes 'regexp' and 'repl' are given, it applies them for replacement operations to every distinct row
+            wrapped with 'sep' before splitting, so the rules matching the delimiter work at the row boundaries
+            like in the entire joined text ('^' and '$' match the boundaries of every row).
 
         Parameters
         ----------
@@ -248,10 +1714,10 @@ class TextPreprocessing:
             If True, saves the result in self.unique_tokens variable (default is True)
         sep : str, optional
             A delimiter for concatenating the extracted tokens (default is ',')
-        regexp : str, optional
-            A regular expression as Python’s raw string notation (r'regexp') (default is None)
-        repl : str, optional
-            A string for the replacing operation (default is an empty string)
+        regexp : list, optional
+            Regular expressions as Python’s raw string notation (r'regexp') (default is None)
+        repl : list, optional
+            Strings for the replacing operations, one for every regular expression (default is None)
                     
         Returns
         -------
@@ -265,18 +1731,36 @@ class TextPreprocessing:
         else:
             text_col = self.textcol_mod
             
-        result = text_col.str.cat(sep=sep)
-        
-        if regexp and repl:
-            for exp, rpl in zip(regexp, repl):
-                print(exp, rpl)
-                len_before = len(result)
-                result = re.sub(exp, rpl, result)
-                len_after = len(result)
-                print(f'Before: {len_before} ==> After: {len_after}')
-                
-        result = pd.Series(result.split(sep)).unique()
-        result = pd.Series(result)
+        rules = [(re.compile(exp), rpl) for exp, rpl in zip(regexp, repl)] if regexp and repl else []
+        lengths = [[0, 0] for _ in rules]
+
+        # dict keeps the order of the first occurrence, every distinct row is processed only once
+        unique = {}
+        seen = set()
+        for text in text_col:
+            if not isinstance(text, str):
+                if pd.isna(text):
+                    continue
+                text = str(text)
+            if rules:
+                if text in seen:
+                    continue
+                seen.add(text)
+                text = sep + text + sep
+                for i, (exp, rpl) in enumerate(rules):
+                    lengths[i][0] += len(text)
+                    text = exp.sub(rpl, text)
+                    lengths[i][1] += len(text)
+                # the empty parts left by the wrapping delimiters aren't the tokens of the row
+                text = text.removeprefix(sep).removesuffix(sep)
+            for token in text.split(sep):
+                unique.setdefault(token, None)
+
+        for (exp, rpl), (len_before, len_after) in zip(rules, lengths):
+            print(exp.pattern, rpl)
+            print(f'Before: {len_before} ==> After: {len_after}')
+
+        result = pd.Series(list(unique), dtype=object)
         result = result[(result!='') & (result!=' ')]
                
         print(f'Final list length: {len(result)}')
@@ -288,7 +1772,8 @@ class TextPreprocessing:
     ### ------------------------------------------------------------------------------------------
     
     ### for cleaning text in the column from named entity
-    def clear_from_label(self, text_col=None, labels='all', update=True, remove='all', filtered=False, aliquot=10):
+    def clear_from_label(self, text_col=None, labels='all', update=True, remove='all', filtered=False, aliquot=10,
+                         n_jobs=1, chunk_size=1000, dedup=False):
         """ Deletes from text data the named entities specified by the parameter 'labels'.
             Named entities can be the certain groups of patterns joined by similar meaning
             (geographic objects, firstnames and lastnames of people, organizations manes).
@@ -314,6 +1799,14 @@ class TextPreprocessing:
         aliquot : int or None, optional
             If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
             if None, doesn't show an indicator(default is 10).
+        n_jobs : int, optional
+            A number of worker processes processing the chunks of the column, -1 means all available CPU.
+            If 1, the column is processed in the current process (default is 1)
+        chunk_size : int, optional
+            A number of rows in one chunk processed by a worker process (default is 1000)
+        dedup : bool, optional
+            If True, every distinct text is processed once and the results are broadcast to all its rows.
+            The dedup ratio is printed and saved into self.dedup_stats (default is False)
                     
         Returns
         -------
@@ -328,51 +1821,67 @@ class TextPreprocessing:
             
             Use the parameters 'update' and/or 'filtered' for obtaining the filtered result
         """
-        ## built-in func for processing Series
-        def _clear_from_label(string, labels, remove, aliquot):
+        from spacy.attrs import ENT_TYPE, IDX, IS_PUNCT, LENGTH
+        from spacy.tokens import Doc
 
-            def check_cond(value_for_check, labels):
-                if labels == 'all':
-                    return value_for_check.ent_type_ != ''
-                                
-                return value_for_check.ent_type_ in labels
+        ## built-in func for checking the label of a named entity ('' means a token outside entities)
+        def check_cond(label, labels):
+            if labels == 'all':
+                return label != ''
 
-            # for progress visualization
-            if aliquot:
-                self.counter += 1
-            
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
-                
-            # checking for NaN
-            if pd.isna(string):
-                return pd.Series([pd.NA, pd.NA])
-                
-            doc = self.nlp(string)
-            stats = 0
-            # excluding all text if it has even one token as named entity           
-            if remove == 'all':
-                if any([check_cond(token, labels) for token in doc]):
-                    stats = -1
-                result = string
-
-            # filtering text from chosen named entity
-            elif remove == 'every':
-                res_list = [token.text for token in doc if not check_cond(token, labels) and not token.is_punct]
-                result = (' '.join(res_list))
-                if result == '':
-                    stats = -1
+            return label in labels
+
+        ## built-in func for processing the parsed column into two flat arrays
+        def _clear_from_label(nlp_textcol, text_col, labels, remove):
+
+            results = np.full(len(nlp_textcol), pd.NA, dtype=object)
+            stats = np.full(len(nlp_textcol), pd.NA, dtype=object)
+            outside_matched = check_cond('', labels)
+            label_matched = {}
+
+            def _matched(label):
+                if label not in label_matched:
+                    label_matched[label] = check_cond(label, labels)
+                return label_matched[label]
+
+            # the texts of Docs are equal to the source strings, so they aren't rebuilt from tokens
+            for i, (doc, string) in enumerate(zip(nlp_textcol, text_col)):
+                # checking for NaN
+                if not isinstance(doc, Doc):
+                    continue
+                string = str(string)
+
+                # excluding all text if it has even one token as named entity, stops at the first one found
+                if remove == 'all':
+                    found = any(_matched(ent.label_) for ent in doc.ents)
+                    if not found and outside_matched:
+                        found = len(doc) > sum(len(ent) for ent in doc.ents)
+                    results[i] = string
+                    stats[i] = -1 if found else 0
+
+                # filtering text from chosen named entity
+                elif remove == 'every':
+                    ent_types, is_punct, starts, lengths = doc.to_array([ENT_TYPE, IS_PUNCT, IDX, LENGTH]).T
+                    matched = [ent_type for ent_type in set(ent_types.tolist())
+                               if _matched(doc.vocab.strings[ent_type])]
+                    keep = is_punct == 0
+                    for ent_type in matched:
+                        keep &= ent_types != ent_type
+                    # the texts of the tokens are sliced from the source string
+                    res_list = [string[start:start + length]
+                                for start, length in zip(starts[keep].tolist(), lengths[keep].tolist())]
+                    results[i] = ' '.join(res_list)
+                    stats[i] = -1 if results[i] == '' else len(doc) - len(res_list)
+
+                # excluding all text if it has all of tokens as named entity, stops at the first one not found
                 else:
-                    stats = len(doc) - len(res_list)
-                    
-            # excluding all text if it has all of tokens as named entity                               
-            else:
-                if all([check_cond(token, labels) for token in doc]):
-                    stats = -1
-                result = string
-            
-            return pd.Series([result, stats])
+                    found = outside_matched or len(doc) == sum(len(ent) for ent in doc.ents)
+                    found = found and all(_matched(ent.label_) for ent in doc.ents)
+                    results[i] = string
+                    stats[i] = -1 if found else 0
+
+            cleared_textcol = pd.DataFrame({'result': results, 'stats': stats}, index=nlp_textcol.index)
+            return cleared_textcol.infer_objects()
 
         # checking incoming var and switch to internal varible
         if isinstance(text_col, (list, tuple, pd.Series)):
@@ -380,19 +1889,17 @@ class TextPreprocessing:
                 text_col = pd.Series(text_col)
         else:
             text_col = self.unique_tokens
-            
-
-        # initialization of progress counter
-        if aliquot:
-            self.iter_lenth = len(text_col)
-            self.counter = 0
-            self.progr = IntProgress(description='Progress: ', min=0, max=self.iter_lenth)
-            self.label = Label(value="0")
-            display(widgets.HBox([self.progr, self.label]))
 
         # processing text in the columns
-        cleared_textcol = text_col.apply(_clear_from_label, args=(labels, remove, aliquot))
-        cleared_textcol.columns = ['result', 'stats']
+        if dedup:
+            cleared_textcol = self._run_dedup('clear_from_label', text_col, labels=labels, remove=remove, update=False,
+                                              aliquot=aliquot, n_jobs=n_jobs, chunk_size=chunk_size)
+        elif n_jobs != 1:
+            cleared_textcol = self._run_sharded('clear_from_label', text_col, n_jobs, chunk_size, aliquot,
+                                                labels=labels, remove=remove, update=False)
+        else:
+            nlp_textcol = self._nlp_pipe(text_col, aliquot=aliquot, components=self._method_components('clear_from_label'))
+            cleared_textcol = _clear_from_label(nlp_textcol, text_col, labels, remove)
 
         # for update internal var
         if update:
@@ -410,7 +1917,8 @@ class TextPreprocessing:
     ### -------------------------------------------------------------------------------------   
     
     ### for extraction named entity from the text in the column
-    def extract_ents(self, text_col=None, labels='ru', aliquot=10, sep=',', filtered=False, rest=True, inverse=False):
+    def extract_ents(self, text_col=None, labels='ru', aliquot=10, sep=',', filtered=False, rest=True, inverse=False,
+                     single_pass=True, dedup=False):
         """ Extracts from text data the named entities specified by the parameter 'labels'.
             Named entities can be the certain groups of patterns joined by similar meaning
             (geographic objects, firstnames and lastnames of people, organizations manes).
@@ -436,6 +1944,12 @@ class TextPreprocessing:
             If True, adds the column with the remained text, after named entities extraction, to the final result (default is True)
         inverse : bool, optional
             If True, uses only with the parameter 'filtered'=True to obtain cleaned from named entities series(default is False)
+        single_pass : bool, optional
+            If True, distributes the tokens of every row among all label columns and the rest in one pass,
+            otherwise processes the rows separately for every label(default is True)
+        dedup : bool, optional
+            If True, every distinct text is processed once and the results are broadcast to all its rows.
+            The dedup ratio is printed and saved into self.dedup_stats (default is False)
                             
         Returns
         -------
@@ -445,21 +1959,14 @@ class TextPreprocessing:
             If 'rest'=True, adds the column with the remained text after named entities extraction.
             Use the parameters 'filtered' for obtaining the filtered series
         """
+        from spacy.tokens import Doc
+
         ## built-in func for the processing Series 
-        def _extract_ents_w_label(string, labels, aliquot, sep, inverse=False):
-                
-            # for progress visualization
-            if aliquot:
-                self.counter += 1
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
+        def _extract_ents_w_label(doc, labels, sep, inverse=False):
                 
             # checking for NaN
-            if pd.isna(string):
+            if not isinstance(doc, Doc):
                 return np.nan
-                
-            doc = self.nlp(string)
 
             if inverse:
                 result = [token.text for token in doc if not token.ent_type_ in labels]
@@ -470,6 +1977,30 @@ class TextPreprocessing:
                 return np.nan
                 
             return result
+
+        ## built-in func for distributing tokens of every row among all labels
+        def _extract_ents_all_labels(nlp_textcol, labels_list, sep, rest):
+
+            label_set = set(labels_list)
+            columns = {label: [] for label in labels_list}
+            if rest:
+                columns['rest'] = []
+
+            for doc in nlp_textcol:
+                buckets = {label: [] for label in columns}
+                if isinstance(doc, Doc):
+                    for token in doc:
+                        if token.ent_type_ in label_set:
+                            buckets[token.ent_type_].append(token.text)
+                        elif rest:
+                            buckets['rest'].append(token.text)
+                    for label, words in buckets.items():
+                        columns[label].append(sep.join(words) if words else np.nan)
+                else:
+                    for label in columns:
+                        columns[label].append(np.nan)
+
+            return pd.DataFrame(columns, index=nlp_textcol.index)
             
         # defining labels list
         if labels == 'ru':
@@ -487,40 +2018,31 @@ class TextPreprocessing:
         else:
             text_col = self.textcol_mod
 
+        if dedup:
+            return self._run_dedup('extract_ents', text_col, labels=labels, aliquot=aliquot, sep=sep, filtered=filtered,
+                                   rest=rest, inverse=inverse, single_pass=single_pass)
+
+        # text data are parsed only once for all labels
+        nlp_textcol = self._nlp_pipe(text_col, aliquot=aliquot, components=self._method_components('extract_ents'))
+
         # for returning concatenated result
         if filtered:
-            if aliquot:
-                self.iter_lenth = len(text_col)
-                self.counter = 0
-                self.progr = IntProgress(description='Progress', min=0, max=self.iter_lenth)
-                self.label = Label(value="0")
-                display(widgets.HBox([self.progr, self.label]))
-            return text_col.apply(_extract_ents_w_label, args=(labels_list, aliquot, sep, inverse))
+            return nlp_textcol.apply(_extract_ents_w_label, args=(labels_list, sep, inverse))
+
+        # searching entity with all chosen labels at once
+        if single_pass:
+            return _extract_ents_all_labels(nlp_textcol, labels_list, sep, rest)
             
         # searching entity with chosen labels
         result = pd.DataFrame()
         for label in self._progress_visual(labels_list, message='Total progr:'):
-            
-            # initialization of progress counter
-            if aliquot:
-                self.iter_lenth = len(text_col)
-                self.counter = 0
-                self.progr = IntProgress(description=f'{label}', min=0, max=self.iter_lenth)
-                self.label = Label(value="0")
-                display(widgets.HBox([self.progr, self.label]))
-            found_ents = text_col.apply(_extract_ents_w_label, args=([label], aliquot, sep))
+            found_ents = nlp_textcol.apply(_extract_ents_w_label, args=([label], sep))
             print(f'{label} processed')
             found_ents.name = label
             result = pd.concat([result, found_ents], axis=1)
 
         if rest:
-            if aliquot:
-                self.iter_lenth = len(text_col)
-                self.counter = 0
-                self.progr = IntProgress(description='the rest', min=0, max=self.iter_lenth)
-                self.label = Label(value="0")
-                display(widgets.HBox([self.progr, self.label]))
-            found_ents = text_col.apply(_extract_ents_w_label, args=(labels_list, aliquot, sep), inverse=True)
+            found_ents = nlp_textcol.apply(_extract_ents_w_label, args=(labels_list, sep), inverse=True)
             print('the rest processed')
             found_ents.name = 'rest'
             result = pd.concat([result, found_ents], axis=1)
@@ -530,7 +2052,7 @@ class TextPreprocessing:
     ### -------------------------------------------------------------------------------------   
     
     ### for extraction named entity from the text in the column
-    def extract_cats(self, text_col=None, labels='all', aliquot=10, df=False, rnd=3):
+    def extract_cats(self, text_col=None, labels='all', aliquot=10, df=False, rnd=3, dedup=False, matrix=False):
         """ Extracts category name for from text data.
             Model has to be learnt to find this categories.
            
@@ -547,28 +2069,31 @@ class TextPreprocessing:
             if None, doesn't show an indicator(default is None).
         df : str, optional
             Outputs the results as dataframe (default is False)
+        rnd : int or None, optional
+            A number of decimals the scores are rounded to, if None, the scores aren't rounded (default is 3)
+        dedup : bool, optional
+            If True, every distinct text is processed once and the results are broadcast to all its rows.
+            The dedup ratio is printed and saved into self.dedup_stats (default is False)
+        matrix : bool, optional
+            If True, the scores are written into the float32 matrix (rows x labels) instead of the dicts.
+            With 'df'=True the dataframe of the categories built on this matrix is returned.
+            A single label is selected like a list of one label, the labels unknown to the model are reported and skipped (default is False)
                                     
         Returns
         -------
-        pd.Series or pd.DataFrame
+        pd.Series, pd.DataFrame or np.ndarray
             
-            A dataframe with the number of columns equal to the number of categories found.            
+            A dataframe with the number of columns equal to the number of categories found.
+            If 'matrix'=True and 'df'=False, the matrix of the scores where NaN rows are NaN.
         """
+        from spacy.tokens import Doc
+
         ## built-in func for the processing Series 
-        def _extract_cats_w_label(string, labels='all', aliquot=10, rnd=3):
-                
-            # for progress visualization
-            if aliquot:
-                self.counter += 1
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
+        def _extract_cats_w_label(doc, labels='all', rnd=3):
                 
             # checking for NaN
-            if pd.isna(string):
+            if not isinstance(doc, Doc):
                 return np.nan
-                
-            doc = self.nlp(string)
 
             result = doc.cats
             result = {key: round(result[key], rnd) for key in result}
@@ -596,14 +2121,24 @@ class TextPreprocessing:
         else:
             text_col = self.textcol_mod
 
+        # the scores are written straight into the matrix
+        if matrix:
+            source = text_col
+            if dedup:
+                codes, source = self._factorize(text_col, 'extract_cats')
+            scores, columns = self._cats_matrix(source, labels, aliquot=aliquot, rnd=rnd)
+            if dedup:
+                scores = scores[codes]
+            if df:
+                return pd.DataFrame(scores, index=text_col.index, columns=columns, copy=False)
+            return scores
+
         # for returning concatenated result
-        if aliquot:
-            self.iter_lenth = len(text_col)
-            self.counter = 0
-            self.progr = IntProgress(description='Progress', min=0, max=self.iter_lenth)
-            self.label = Label(value="0")
-            display(widgets.HBox([self.progr, self.label]))
-        extr_result = text_col.apply(_extract_cats_w_label, args=(labels, aliquot, rnd))
+        if dedup:
+            extr_result = self._run_dedup('extract_cats', text_col, labels=labels, aliquot=aliquot, rnd=rnd)
+        else:
+            nlp_textcol = self._nlp_pipe(text_col, aliquot=aliquot, components=self._method_components('extract_cats'))
+            extr_result = nlp_textcol.apply(_extract_cats_w_label, args=(labels, rnd))
 
         if df:
             if isinstance(labels, (list, tuple, pd.Series)) or labels == 'all':
@@ -614,11 +2149,62 @@ class TextPreprocessing:
             return result
         return extr_result
         
+    def _cats_matrix(self, text_col, labels='all', aliquot=10, rnd=3):
+        """ Parses the given column in batches and writes the scores of the categories into the float32 matrix.
+            The columns are the labels of the components assigning doc.cats (or the keys of doc.cats),
+            the labels are selected by the columns and the scores are rounded in one operation.
+
+        Returns
+        -------
+        tuple
+            The matrix (rows x labels) and the list of the labels of its columns.
+        """
+        from spacy.tokens import Doc
+
+        nlp_textcol = self._nlp_pipe(text_col, aliquot=aliquot, components=self._method_components('extract_cats'))
+        docs = nlp_textcol.to_numpy()
+        positions = np.flatnonzero([isinstance(doc, Doc) for doc in docs])
+
+        # the labels of the model in the order of doc.cats
+        model_labels = []
+        for name in self.nlp.pipe_names:
+            if 'doc.cats' in self.nlp.get_pipe_meta(name).assigns:
+                model_labels += [label for label in getattr(self.nlp.get_pipe(name), 'labels', ()) if label not in model_labels]
+        if not model_labels:
+            for i in positions:
+                model_labels += [label for label in docs[i].cats if label not in model_labels]
+
+        if isinstance(labels, str) and labels == 'all':
+            columns = model_labels
+        elif isinstance(labels, (list, tuple, pd.Series, str)):
+            # a single label is selected like a list, the labels unknown to the model are reported and skipped
+            labels = [labels] if isinstance(labels, str) else list(labels)
+            unknown = [label for label in labels if label not in model_labels]
+            if unknown:
+                print(f'!!!Unknown labels: {unknown}')
+                print(f'Use the labels of the model: {model_labels}')
+            columns = [label for label in model_labels if label in labels]
+        else:
+            print('!!!Wrong format for parameter "labels"')
+            print('Use list of str or str')
+            sys.exit()
+
+        scores = np.full((len(docs), len(columns)), np.nan, dtype=np.float32)
+        for i in positions:
+            cats = docs[i].cats
+            scores[i] = [cats.get(label, np.nan) for label in columns]
+        if rnd is not None:
+            np.round(scores, rnd, out=scores)
+
+        return scores, list(columns)
+
     ### -----------------------------------------------------------------------------    
     
-    def vect(self, text_col=None, nlp=None, update=True, filtered=True, aliquot=10, full_df=False):
+    def vect(self, text_col=None, nlp=None, update=True, filtered=True, aliquot=10, full_df=False, store_path=None,
+             dedup=False):
         """ Vectorizes text data in the given column and marks the rows which don't have vectors.
             Use 'full_df'=True to obtain the full dataset as result. 
+            For models with static vectors the texts are only tokenized and the vectors are computed in bulk.
         
         Parameters
         ----------
@@ -629,7 +2215,7 @@ class TextPreprocessing:
             otherwise self.nlp is used (default is None)
         update : bool, optional
             If True, rewrites self.unique_tokens with the result of the processing 
-            and saves the corresponding vectors into self.utokens_vectors(default is True)
+            and saves the corresponding vectors into self.utokens_vectors as VectorStore (default is True)
         filtered : bool, optional
             If True, returns only filtered result as series where the text data are an index and the corresponding vectors are values.
         aliquot : int or None, optional
@@ -637,6 +2223,11 @@ class TextPreprocessing:
             if None, doesn't show an indicator(default is 10).
         full_df : bool, optional
             If True, returns the full dataset as result. There are 3 columns in that dataset: text, vectors and flags of availability vectors
+        store_path : str or None, optional
+            If given, the matrix of self.utokens_vectors is written to this .npy file and memory-mapped (default is None)
+        dedup : bool, optional
+            If True, every distinct text is processed once and the results are broadcast to all its rows.
+            The dedup ratio is printed and saved into self.dedup_stats (default is False)
                     
         Returns
         -------
@@ -646,26 +2237,8 @@ class TextPreprocessing:
             There are 3 columns in that dataset: 'text_col', 'vectors', 'has_vectors'.
             If 'full_df'=False, returns series where the text data are an index and the corresponding vectors are values.
         """
+        from spacy.tokens import Doc
 
-        def _vect(string, aliquot):
-            
-            # for progress visualization
-            if aliquot:
-                self.counter += 1
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
-                
-            # checking for NaN
-            if pd.isna(string):
-                return pd.Series([pd.NA, pd.NA, 0])
-
-            nlp_string = nlp(string)
-            if nlp_string.has_vector:
-                return pd.Series([string, nlp_string.vector, 1])
-                
-            return pd.Series([string, nlp_string.vector, 0])
-        
         # checking incoming var and switch to internal variable
         if isinstance(text_col, (list, tuple, pd.Series)):
             if isinstance(text_col, (list, tuple)):
@@ -678,44 +2251,71 @@ class TextPreprocessing:
         else:
             nlp = self.nlp
 
-        # for visualization initialization
-        if aliquot:
-            self.iter_lenth = len(text_col)
-            self.counter = 0
-            self.progr = IntProgress(description='Progress:', min=0, max=self.iter_lenth)
-            self.label = Label(value="0")
-            display(widgets.HBox([self.progr, self.label]))
+        # every distinct text is vectorized once and the result is broadcast to its rows
+        source = text_col
+        if dedup:
+            codes, source = self._factorize(text_col, 'vect')
+
+        # writing the vectors straight into one matrix, NaN rows have no vectors
+        texts = np.full(len(source), pd.NA, dtype=object)
+        has_vectors = np.zeros(len(source), dtype=np.int64)
 
-        # text_col prrocessing
-        vect_df = text_col.apply(_vect, args=(aliquot,))
-        vect_df.columns = ['text_col', 'vectors', 'has_vectors']
+        if self.prune_pipes and _static_vectors_only(nlp):
+            # static vectors: only tokenizing and the means of the looked up rows
+            is_doc = source.notna().to_numpy()
+            strings = source[is_doc].astype(str)
+            if aliquot and len(strings):
+                print(f'Looking up static vectors for {len(strings)} texts')
+            docs, doc_vectors, doc_has_vector = _static_doc_vectors(nlp, strings, batch_size=self.batch_size)
+            dim = doc_vectors.shape[1] if is_doc.any() else 0
+            matrix = np.zeros((len(source), dim), dtype=np.float32)
+            matrix[is_doc] = doc_vectors[:, :dim]
+            texts[is_doc] = [doc.text for doc in docs]
+            has_vectors[is_doc] = doc_has_vector
+        else:
+            # text_col prrocessing
+            nlp_textcol = self._nlp_pipe(source, nlp=nlp, aliquot=aliquot, components=self._method_components('vect', nlp))
+            docs = nlp_textcol.to_numpy()
+            is_doc = np.fromiter((isinstance(doc, Doc) for doc in docs), dtype=bool, count=len(docs))
+            dim = docs[is_doc][0].vector.shape[0] if is_doc.any() else 0
+            matrix = np.zeros((len(docs), dim), dtype=np.float32)
+            for i in np.flatnonzero(is_doc):
+                doc = docs[i]
+                texts[i] = doc.text
+                matrix[i] = doc.vector
+                has_vectors[i] = doc.has_vector
+
+        if dedup:
+            texts, matrix, has_vectors, is_doc = texts[codes], matrix[codes], has_vectors[codes], is_doc[codes]
 
         if full_df:
-            return vect_df
+            vectors = np.full(len(text_col), pd.NA, dtype=object)
+            for i in np.flatnonzero(is_doc):
+                vectors[i] = matrix[i]
+            return pd.DataFrame({'text_col': texts, 'vectors': vectors, 'has_vectors': has_vectors},
+                                index=text_col.index)
 
-        if filtered:
-            
-            filt_textcol = vect_df[vect_df['has_vectors'] == 1]['text_col']
-            filt_vect = vect_df[vect_df['has_vectors'] == 1]['vectors']
-        else:
-            filt_textcol = vect_df['text_col']
-            filt_vect = vect_df['vectors']
+        rows = np.flatnonzero(has_vectors == 1) if filtered else np.arange(len(text_col))
+        filt_textcol = pd.Series(texts[rows], index=text_col.index[rows], name='text_col')
+        store = VectorStore.from_vectors(texts[rows], matrix[rows], dim, path=store_path)
 
         if update:
             l_before = len(self.unique_tokens)
             self.unique_tokens = filt_textcol
-            self.utokens_vectors = filt_vect
+            self.utokens_vectors = store
             l_after = len(self.unique_tokens)
             print(f'Unique tokens: {l_before} => {l_after}')
-            
-        filt_vect.index = filt_textcol
-        
+
+        filt_vect = store.to_series()
+        filt_vect.iloc[np.flatnonzero(~is_doc[rows])] = pd.NA
+
         return filt_vect
         
     ### --------------------------------------------------------------------------------------------
     
     def word_extractor(self, pattern=None, text_col=None, threshold=None, count_thres=None,
-                       dep=None, pos=None, desc_sim=False, stat=False, full_df=False, aliquot=10):
+                       dep=None, pos=None, desc_sim=False, stat=False, full_df=False, aliquot=10,
+                       n_jobs=1, chunk_size=1000):
         """ Extracts the certain number of words from text data in the given column. The words must match the specified parameters.
             Use 'full_df'=True to get full dataset with the information about word dependences and parts of the speech.
                     
@@ -749,6 +2349,11 @@ class TextPreprocessing:
         aliquot : int or None, optional
             If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
             if None, doesn't show an indicator(default is 10).
+        n_jobs : int, optional
+            A number of worker processes parsing and processing the chunks of the text column, -1 means all available CPU.
+            If 1, the column is processed in the current process (default is 1)
+        chunk_size : int, optional
+            A number of rows in one chunk processed by a worker process (default is 1000)
                             
         Returns
         -------
@@ -759,129 +2364,241 @@ class TextPreprocessing:
             If 'full_df'=False, returns series with extracted words. 
             If 'stat'=True, adds column with statistics and the series turns into dataframe.
         """
+        from spacy.tokens import Doc
 
-        def _word_extractor(string, pattern=None, threshold=None, count_thres=None, dep=None, pos=None,
-                            desc_sim=False, stat=False, full_df=False, aliquot=10):
-            # for progress visualization
-            if aliquot:
-                self.counter += 1
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
-                
-            # checking for NaN
-            if pd.isna(string):
-                if full_df:
-                    return pd.Series({'NOUN': np.nan})
-                if stat:
-                    return pd.Series([None] * 2)
-                return None
+        # parsing and processing the chunks of the raw text column in worker processes
+        if n_jobs != 1 and not isinstance(text_col, Doc):
+            if isinstance(text_col, (list, tuple)):
+                text_col = pd.Series(text_col)
+            elif not isinstance(text_col, pd.Series):
+                text_col = self.textcol_mod
+            return self._run_sharded('word_extractor', text_col, n_jobs, chunk_size, aliquot,
+                                     pattern=pattern, threshold=threshold, count_thres=count_thres, dep=dep, pos=pos,
+                                     desc_sim=desc_sim, stat=stat, full_df=full_df)
 
-            
-            #if not nlp_string.has_vector:
-            #    if stat:
-            #        return pd.Series([None, 'NO VECTORS'])    
-            #    return None
+        if pattern:
+            nlp_pattern = self.nlp(pattern.lower())
+        else:
+            nlp_pattern = None
+
+        
+        # checking incoming var and switch to internal varible
+        if isinstance(text_col, (list, tuple, pd.Series)):
+            if isinstance(text_col, (list, tuple)):
+                text_col = pd.Series(text_col)
+            nlp_textcol = self.nlp_processing(text_col, aliquot=aliquot)
+            self.word_extractor_nlp = text_col            
+
+        elif isinstance(text_col, Doc):
+            self.word_extractor_nlp = text_col
+            nlp_textcol = pd.Series([text_col])
                 
+        elif hasattr(self, 'word_extractor_nlp'):
+            nlp_textcol = self.word_extractor_nlp
+                    
+        else:
+            nlp_textcol = self.nlp_processing(self.textcol_mod, aliquot=aliquot)
+            self.word_extractor_nlp = nlp_textcol
+        
+        # for visualization initialization
+        progress = make_progress_bar(self.progress, len(nlp_textcol)) if aliquot else None
+
+        # collecting the tokens of all texts into one flat table
+        docs = nlp_textcol.to_numpy()
+        table = self._token_table(docs, nlp_pattern, progress)
+        if progress is not None:
+            progress.close()
+
+        row = table['row'].to_numpy()
+        tokens = table['tokens'].to_numpy()
+
+        if full_df:
+            return self._token_label_frame(table, docs, nlp_textcol.index)
+
+        # filtering the flat table
+        mask = np.ones(len(table), dtype=bool)
+        if pattern and threshold:
+            mask &= table['similarity'].to_numpy() >= threshold
+        if dep:
+            mask &= table['dependences'].isin(dep).to_numpy()
+        if pos:
+            mask &= table['poses'].isin(pos).to_numpy()
+        selected = np.flatnonzero(mask)
+
+        # codes of (row, token) pairs for selecting and dropping duplicates
+        token_codes, token_uniques = pd.factorize(tokens)
+        pair_codes = row.astype(np.int64) * max(len(token_uniques), 1) + token_codes
+
+        if count_thres:
             if pattern:
-                sim_df = pd.DataFrame([(token.text, token.similarity(pattern),
-                                        token.dep_, token.pos_) for token in string if token.has_vector],
-                                      columns=['tokens', 'similarity', 'dependences', 'poses'])
-                if full_df:
-                    res_df = pd.concat([sim_df.pivot_table(columns='dependences', values='tokens', aggfunc=','.join),
-                                        sim_df.pivot_table(columns='poses', values='tokens', aggfunc=','.join)], axis=1)
-                                        
-                    res_df = pd.Series(res_df.loc['tokens', :], index=res_df.columns)
-                    return res_df
-                
-                if threshold:
-                    result = sim_df[sim_df['similarity'] >= threshold]
+                # the tokens with the greatest similarity in every row, only the rows longer than count_thres are partitioned
+                similarity = table['similarity'].to_numpy()
+                starts = np.flatnonzero(np.r_[True, row[selected][1:] != row[selected][:-1]]) if len(selected) else selected
+                ends = np.r_[starts[1:], len(selected)]
+                top = np.ones(len(selected), dtype=bool)
+                for start, end in zip(starts[ends - starts > count_thres], ends[ends - starts > count_thres]):
+                    top[start:end] = False
+                    top[start + np.argpartition(-similarity[selected[start:end]], count_thres - 1)[:count_thres]] = True
+                selected = selected[np.isin(pair_codes[selected], pair_codes[selected[top]])]
+            else:
+                selected = selected[self._group_rank(row[selected]) < count_thres]
+            selected = selected[~pd.Series(pair_codes[selected]).duplicated().to_numpy()]
 
-            
+        if desc_sim and pattern:
+            similarity = table['similarity'].to_numpy()
+            selected = selected[np.lexsort((-similarity[selected], row[selected]))]
+
+        result = np.full(len(docs), None, dtype=object)
+        groups, joined = _join_groups(row[selected], tokens[selected], ' ')
+        result[groups] = joined
+        result = pd.Series(result, index=nlp_textcol.index, name=nlp_textcol.name)
+
+        if stat:
+            columns = [col for col in ('tokens', 'similarity', 'dependences', 'poses') if col in table]
+            statistics = np.full(len(docs), None, dtype=object)
+            is_doc = np.fromiter((isinstance(doc, Doc) for doc in docs), dtype=bool, count=len(docs))
+            statistics[is_doc] = '{}'
+            records = table[columns].to_dict(orient='records')
+            bounds = np.flatnonzero(np.r_[True, row[1:] != row[:-1], True]) if len(row) else []
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                statistics[row[start]] = str(dict(enumerate(records[start:end])))
+            result = pd.DataFrame({'sf_result': result, 'statistics': statistics}, index=nlp_textcol.index)
+
+        return result
+
+    @staticmethod
+    def _group_rank(groups):
+        # a position of every element inside its group, groups must be sorted
+        if not len(groups):
+            return np.zeros(0, dtype=np.int64)
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+        sizes = np.diff(np.r_[starts, len(groups)])
+        return np.arange(len(groups)) - np.repeat(starts, sizes)
+
+    def _token_table(self, docs, nlp_pattern=None, progress=None):
+        """ Collects the tokens having vectors of all Docs into one flat table with the columns
+            'row' (a position of the Doc), 'tokens', 'similarity' (if nlp_pattern is given), 'dependences', 'poses'.
+            The attributes are taken by Doc.to_array. The vectors of all tokens are gathered into one matrix
+            and the similarities are calculated by one product with the normalized pattern vector.
+        """
+        from spacy.tokens import Doc
+        from spacy.attrs import ORTH, DEP, POS
+
+        # every Doc adds ('sims', similarities), ('rows', rows of vocab vectors) or ('tensor', matrix)
+        rows, attrs, sources = [], [], []
+        strings = None
+        data = None
+        for i, doc in enumerate(docs):
+            if progress is not None:
+                progress.update()
+
+            if not isinstance(doc, Doc) or not len(doc):
+                continue
+            strings = doc.vocab.strings
+            vectors = doc.vocab.vectors
+            array = doc.to_array([getattr(vectors, 'attr', ORTH), ORTH, DEP, POS])
+
+            if (set(doc.user_token_hooks) & {'has_vector', 'vector', 'vector_norm', 'similarity'}
+                    or getattr(vectors, 'mode', 'default') != 'default'):
+                # custom vectors are processed by the spacy token methods
+                has_vector = np.fromiter((token.has_vector for token in doc), dtype=bool, count=len(doc))
+                if nlp_pattern is not None:
+                    sources.append(('sims', np.array([token.similarity(nlp_pattern) for token in doc if token.has_vector],
+                                                     dtype=np.float64)))
+            elif vectors.size == 0 and doc.tensor.size != 0:
+                has_vector = np.ones(len(doc), dtype=bool)
+                sources.append(('tensor', doc.tensor))
             else:
-                sim_df = pd.DataFrame([(token.text, token.dep_,
-                                        token.pos_) for token in string if token.has_vector], columns=['tokens',
-                                                                                                           'dependences', 'poses'])
-                if full_df:
-                    res_df = pd.concat([sim_df.pivot_table(columns='dependences', values='tokens', aggfunc=','.join),
-                                        sim_df.pivot_table(columns='poses', values='tokens', aggfunc=','.join)], axis=1)
-                                        
-                    res_df = pd.Series(res_df.loc['tokens', :], index=res_df.columns)
-                    return res_df
-                    
-                
-            result = sim_df
-            
-                            
-            if dep:
-                result = result[result['dependences'].isin(dep)]
-            
-            if pos:
-                result = result[result['poses'].isin(pos)]
-               
-            if count_thres:
-                if pattern:
-                    sorted_res = result.sort_values('similarity', ascending=False).iloc[:count_thres, :]['tokens']
-                    result = result[result['tokens'].isin(sorted_res)]
-                else:
-                    sorted_res = result.iloc[:count_thres, :]['tokens']
-                
-                result = result.drop_duplicates(subset='tokens')
+                vector_rows = vectors.find(keys=array[:, 0])
+                has_vector = vector_rows >= 0
+                data = vectors.data
+                sources.append(('rows', vector_rows[has_vector]))
 
-            if desc_sim:
-                if pattern:
-                    result = result.sort_values('similarity', ascending=False)
+            rows.append(np.full(has_vector.sum(), i, dtype=np.int64))
+            attrs.append(array[has_vector, 1:])
 
-            result = result['tokens'].str.cat(sep=' ')
-            if result == '':
-                result = None
-            if stat:
-                statistics = str(sim_df.to_dict(orient='index'))
-                return pd.Series([result, statistics])
+        attrs = np.concatenate(attrs) if attrs else np.zeros((0, 3), dtype=np.uint64)
+
+        # converting the hashes to strings once for every distinct value
+        columns = []
+        for col in range(3):
+            uniques, inverse = np.unique(attrs[:, col], return_inverse=True)
+            labels = np.array([strings[int(value)] for value in uniques], dtype=object)
+            columns.append(labels[inverse.reshape(-1)])
+
+        table = {'row': np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64), 'tokens': columns[0]}
+        if nlp_pattern is not None:
+            table['similarity'] = self._pattern_similarity(sources, data, nlp_pattern)
+        table['dependences'] = columns[1]
+        table['poses'] = columns[2]
+        return pd.DataFrame(table)
+
+    @staticmethod
+    def _pattern_similarity(sources, data, nlp_pattern):
+        # cosine similarity to the pattern, 0 for zero vectors like in spacy Token.similarity
+        pattern_norm = nlp_pattern.vector_norm
+        unit = nlp_pattern.vector / pattern_norm if pattern_norm else np.zeros_like(nlp_pattern.vector)
 
+        def _cosine(matrix):
+            norms = np.sqrt((matrix ** 2).sum(axis=1))
+            result = np.zeros(len(matrix), dtype=np.float64)
+            nonzero = norms != 0
+            result[nonzero] = (matrix[nonzero] @ unit) / norms[nonzero]
             return result
 
-        if pattern:
-            nlp_pattern = self.nlp(pattern.lower())
-        else:
-            nlp_pattern = None
+        # the vocab vectors are used once for every distinct word, the tensors are stacked into one matrix
+        results = {}
+        vector_rows = [value for kind, value in sources if kind == 'rows']
+        if vector_rows:
+            uniques, inverse = np.unique(np.concatenate(vector_rows), return_inverse=True)
+            results['rows'] = _cosine(data[uniques])[inverse.reshape(-1)]
+        tensors = [value for kind, value in sources if kind == 'tensor']
+        if tensors:
+            results['tensor'] = _cosine(np.vstack(tensors))
+        results['sims'] = np.concatenate([value for kind, value in sources if kind == 'sims'] or [np.zeros(0)])
 
-        
-        # checking incoming var and switch to internal varible
-        if isinstance(text_col, (list, tuple, pd.Series)):
-            if isinstance(text_col, (list, tuple)):
-                text_col = pd.Series(text_col)
-            nlp_textcol = self.nlp_processing(text_col)
-            self.word_extractor_nlp = text_col            
+        # restoring the order of the Docs
+        offsets = dict.fromkeys(results, 0)
+        similarity = []
+        for kind, value in sources:
+            similarity.append(results[kind][offsets[kind]:offsets[kind] + len(value)])
+            offsets[kind] += len(value)
+        return np.concatenate(similarity) if similarity else np.zeros(0)
 
-        elif isinstance(text_col, spacy.tokens.doc.Doc):
-            self.word_extractor_nlp = text_col
-            nlp_textcol = text_col
-                
-        elif hasattr(self, 'word_extractor_nlp'):
-            nlp_textcol = self.word_extractor_nlp
-                    
-        else:
-            nlp_textcol = self.nlp_processing(self.textcol_mod)
-            self.word_extractor_nlp = nlp_textcol
-        
-        # for visualization initialization
-        if aliquot:
-            self.iter_lenth = len(nlp_textcol)
-            self.counter = 0
-            self.progr = IntProgress(description='Progress:', min=0, max=self.iter_lenth)
-            self.label = Label(value="0")
-            display(widgets.HBox([self.progr, self.label]))
-
-        # text_col prrocessing
-        if stat:
-            result = nlp_textcol.apply(_word_extractor, args=(nlp_pattern, threshold, count_thres, dep, pos, desc_sim, stat, full_df, aliquot))
-            result.columns = ['sf_result', 'statistics']
-            return result
+    @staticmethod
+    def _token_label_frame(table, docs, index):
+        # joining the tokens of every row by dependence and part of speech labels,
+        # the columns are in the order of the first occurrence (the labels of one row are sorted)
+        row = table['row'].to_numpy()
+        tokens = table['tokens'].to_numpy()
+        isna = np.flatnonzero(pd.isna(docs))
 
-        result = nlp_textcol.apply(_word_extractor, args=(nlp_pattern, threshold, count_thres, dep, pos, desc_sim, stat, full_df, aliquot))
-        
-        return result
+        columns, keys = [], []
+        for kind, col in enumerate(('dependences', 'poses')):
+            codes, labels = pd.factorize(table[col].to_numpy())
+            width = max(len(labels), 1)
+            groups, joined = _join_groups(row * width + codes, tokens, ',')
+            values = np.full((len(docs), len(labels)), np.nan, dtype=object)
+            values[groups // width, groups % width] = joined
+            first = np.full(len(labels), len(docs), dtype=np.int64)
+            np.minimum.at(first, codes, row)
+            for j, label in enumerate(labels):
+                columns.append(pd.Series(values[:, j], index=index, name=label))
+                keys.append((first[j], kind, label))
+
+        # rows without a text have only the column NOUN
+        if len(isna):
+            if (1, 'NOUN') in [(kind, label) for _, kind, label in keys]:
+                j = [(kind, label) for _, kind, label in keys].index((1, 'NOUN'))
+                keys[j] = (min(keys[j][0], isna[0]), 1, 'NOUN')
+            else:
+                columns.append(pd.Series(np.nan, index=index, name='NOUN', dtype=object))
+                keys.append((isna[0], 1, 'NOUN'))
+
+        if not columns:
+            return pd.DataFrame(index=index)
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return pd.concat([columns[j] for j in order], axis=1)
 
     ### --------------------------------------------------------------------------------------------
     def mapper(self, cat, dict_df, text_col=None, mode='binary', aliquot=1):
@@ -920,38 +2637,14 @@ class TextPreprocessing:
             
         # filtering patterns for target category
         try:
-            pattern_list = dict_df[dict_df['categories'] == cat]['patterns']
+            cat_dict = dict_df[dict_df['categories'] == cat]
         except:
             print('No such categories in the dict')
             exit()
 
-        # matching patterns and text in the column
-        result = pd.Series([0] * len(text_col))
-        base = pd.Series(['nan'] * len(text_col))
-        p_result = base.copy()
-
-        if aliquot:
-            patlist_iter = self._progress_visual(pattern_list, aliquot=1)
-        else:
-            patlist_iter = pattern_list
-        for pattern in patlist_iter:
-            search_res = text_col.str.contains(rf'\b{re.escape(pattern)}\b', case=False, na=False)
-            # returns list of matched patterns for every row
-            if mode == 'patterns':
-                p_result = p_result.str.cat(base.mask(search_res, pattern), sep=',')
-            # returns number of matched patterns for every row
-            else:    
-                result = result + search_res
-                
-        if mode == 'patterns':
-            result = p_result.str.replace(r'nan,?', '', regex=True)
-            result = result.str.replace(r',\Z', '', regex=True)
-        # returns binary feature for every row
-        elif mode == 'binary':
-            result = result > 0
-                        
-        result.name = cat    
-        return result
+        # matching all patterns of the category and text in the column in one pass
+        result = self._map_patterns(PatternMatcher(cat_dict), text_col, aliquot=aliquot)
+        return result.to_frame(mode, [cat])[cat]
         
     ### ----------------------------------------------------------------------------------------
     
@@ -967,37 +2660,143 @@ class TextPreprocessing:
         text_col : list, tuple, pd.Series or None, optional
             If given, it is used as an object of the operation; if None, self.textcol_mod is used (default is None)
         mode : str, optional
-            {binary|patterns|quantity} If 'binary', puts bool values into the result column.
+            {binary|patterns|quantity|sparse} If 'binary', puts bool values into the result column.
             If 'patterns', puts specified patterns in the result column.
-            If 'quantity', puts quantity of the found words into the result column(default is 'binary').
+            If 'quantity', puts quantity of the found words into the result column(default is 'quantity').
+            If 'sparse', returns PatternHits with the sparse (text x pattern) matrix of hits.
         aliquot : int or None, optional
             If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
             if None, doesn't show an indicator(default is 1).
                             
         Returns
         -------
-        pd.DataFrame
+        pd.DataFrame or PatternHits
 
             DataFrame with the columns corresponding the names of categories and containing the values
             which depending on the parameter 'mode'.
+            If 'mode'='sparse', PatternHits, use its methods 'by_category' and 'to_frame' to aggregate the hits.
         """
-        
-        result_df = pd.DataFrame()
+        # defining text column for processing
+        if isinstance(text_col, (list, tuple, pd.Series)):
+            if isinstance(text_col, (list, tuple)):
+                text_col = pd.Series(text_col)
+        else:
+            text_col = self.textcol_mod
+
         cat_list = list(dict_df['categories'].unique())
         try:
             cat_list.remove('UNKNOWN')
         except:
             pass
-        
-        if aliquot:
-            catlist_iter = self._progress_visual(cat_list, aliquot=1)
+
+        # matching patterns of all categories and text in the column in one pass
+        if mode == 'sparse':
+            return self._map_patterns(PatternMatcher(dict_df), text_col, aliquot=aliquot)
+        return self._map_patterns(PatternMatcher(dict_df), text_col, aliquot=aliquot).to_frame(mode, cat_list)
+
+    ### -----------------------------------------------------------------------------------
+
+    def incremental(self, method, text_col=None, key='index', aliquot=10, **kwargs):
+        """ Runs clear_from_label, extract_ents or map_all only for new or changed rows of the given column.
+            The results are kept in self.result_store by the row keys with the hashes of the texts,
+            the new results are merged with the stored ones, so unchanged texts are never processed again.
+
+        Parameters
+        ----------
+        method : str
+            {clear_from_label|extract_ents|map_all} A name of the method.
+        text_col : list, tuple, pd.Series or None, optional
+            If given, it is used as an object of the operation; if None, self.textcol_mod is used (default is None)
+        key : str, optional
+            {index|hash} If 'index', the rows are identified by the index of the column (it must be unique)
+            and a row is processed again if its text is changed.
+            If 'hash', the rows are identified by the content hash, so the equal texts are processed only once (default is 'index')
+        aliquot : int or None, optional
+            If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
+            if None, doesn't show an indicator(default is 10).
+        **kwargs
+            The parameters of the method. The results are stored separately for different parameters and models.
+
+        Returns
+        -------
+        pd.DataFrame or pd.Series
+            The result of the method for all rows of the given column.
+        """
+        if method not in ('clear_from_label', 'extract_ents', 'map_all'):
+            raise ValueError(f"Incremental processing isn't supported for the method '{method}'")
+        if method == 'clear_from_label' and kwargs.get('filtered'):
+            raise ValueError("Use filtered=False with clear_from_label, the filtered result has no row keys")
+        if method == 'map_all' and kwargs.get('mode') == 'sparse':
+            raise ValueError("Use map_all with mode 'binary', 'patterns' or 'quantity'")
+        if method == 'clear_from_label':
+            kwargs['update'] = False
+
+        # checking incoming var and switch to internal varible
+        if isinstance(text_col, (list, tuple, pd.Series)):
+            if isinstance(text_col, (list, tuple)):
+                text_col = pd.Series(text_col)
         else:
-            catlist_iter = cat_list
-            
-        for cat in catlist_iter:
-            result = self.mapper(cat, dict_df, text_col, mode, aliquot=False)
-            result_df = pd.concat([result_df, result], axis=1)
-        return result_df
+            text_col = self.textcol_mod
+
+        hashes = pd.Series([DocBinCache.text_key(text) if isinstance(text, str) else DocBinCache.text_key(repr(text))
+                            for text in text_col], index=text_col.index, dtype=object)
+        if key == 'index':
+            if not text_col.index.is_unique:
+                raise ValueError("The index of the column isn't unique, use key='hash'")
+            keys = text_col.index
+        elif key == 'hash':
+            keys = pd.Index(hashes.to_numpy())
+        else:
+            raise ValueError("The parameter 'key' must be 'index' or 'hash'")
+
+        # the signature binds the stored results with the method, its parameters and the model
+        params = {name: (hashlib.sha1(pd.util.hash_pandas_object(value).to_numpy().tobytes()).hexdigest()
+                         if isinstance(value, (pd.DataFrame, pd.Series)) else value)
+                  for name, value in sorted(kwargs.items())}
+        model = DocBinCache.model_key(self.nlp) if method != 'map_all' else ''
+        signature = f'{method}|{key}|{model}|{params!r}'
+
+        # selecting new and changed rows
+        entry = self.result_store.get(signature)
+        if entry is None:
+            changed = np.ones(len(text_col), dtype=bool)
+        else:
+            changed = entry['hashes'].reindex(keys).to_numpy() != hashes.to_numpy()
+        changed &= ~keys.duplicated()
+
+        if changed.any():
+            new_result = getattr(self, method)(text_col=text_col[changed], aliquot=aliquot, **kwargs)
+            new_result.index = keys[changed]
+            new_hashes = pd.Series(hashes.to_numpy()[changed], index=keys[changed], dtype=object)
+            self.result_store.merge(signature, new_hashes, new_result)
+            self.result_store.save()
+        print(f'Processed rows: {changed.sum()} of {len(text_col)}')
+
+        result = self.result_store.get(signature)['result'].loc[keys]
+        result.index = text_col.index
+        return result
+
+    ### -----------------------------------------------------------------------------------
+
+    def _map_patterns(self, matcher, text_col, aliquot=1):
+        """ Searches all patterns of the compiled matcher in every row of the given column once
+            and returns PatternHits with the sparse matrix of hits."""
+        # equal texts are scanned only once
+        found = {}
+        if aliquot and len(text_col):
+            # the indicator is updated not more often than every 1% of rows
+            text_iter = self._progress_visual(text_col, aliquot=max(aliquot, len(text_col) // 100))
+        else:
+            text_iter = text_col
+        hits = []
+        for text in text_iter:
+            if not isinstance(text, str):
+                hits.append([])
+                continue
+            if text not in found:
+                found[text] = matcher.find(text)
+            hits.append(found[text])
+        return matcher.hit_matrix(hits, text_col.index)
         
     ### -----------------------------------------------------------------------------------
 
@@ -1032,12 +2831,19 @@ class TextPreprocessing:
         else:
             pattern_list = self.unique_tokens
 
+        # the index of the text column is built once and reused by the next calls
+        quoting_index = getattr(self, '_quoting_index', None)
+        if quoting_index is None or quoting_index.text_col is not text_col:
+            quoting_index = QuotingIndex(text_col)
+            if text_col is self.textcol_mod:
+                self._quoting_index = quoting_index
+
         result = []
         for pattern in pattern_list:
             if ratio:
-                quotes = t_col.str.contains(rf'\b{re.escape(pattern)}\b').mean()
+                quotes = quoting_index.ratio(pattern, case=True)
             else:
-                quotes = t_col.str.contains(rf'\b{re.escape(pattern)}\b').sum()
+                quotes = quoting_index.count(pattern, case=True)
             result.append(quotes)
             
         result = pd.DataFrame({'Patterns': pattern_list, 'Number of quotes': result}).sort_values('Number of quotes', ascending=False)
@@ -1049,18 +2855,278 @@ class TextPreprocessing:
 
         if not iter_lenth:
             iter_lenth = len(iter_obj)
-        progr =  IntProgress(description=message, min=0, max=iter_lenth)
-        label = Label(value="0")
-        display(widgets.HBox([progr, label]))
+        progress = make_progress_bar(self.progress, iter_lenth, message)
         for i, elem in enumerate(iter_obj, 1):
             yield elem
             if i == 1 or i % aliquot == 0 or i == iter_lenth:
-                progr.value = i
-                label.value = f'{i} of {str(iter_lenth)}'
+                progress.update(i)
+        progress.close()
+
+    ### -----------------------------------------------------------------------------------
+
+    def _run_sharded(self, method, text_col, n_jobs=-1, chunk_size=1000, aliquot=10, **kwargs):
+        """ Splits the given column into chunks and applies the given method to them in a pool of worker processes.
+            Every worker loads the model once. The results are concatenated in the original order.
+
+        Parameters
+        ----------
+        method : str
+            A name of the method of TextPreprocessing applied to every chunk.
+        text_col : pd.Series
+            A column of text data used as an object for the processing.
+        n_jobs : int, optional
+            A number of worker processes, -1 means all available CPU (default is -1)
+        chunk_size : int, optional
+            A number of rows in one chunk (default is 1000)
+        aliquot : int or None, optional
+            If specified, showes a progress indicator with updating after every processed chunk,
+            if None, doesn't show an indicator(default is 10).
+        kwargs
+            Parameters of the method.
+
+        Returns
+        -------
+        pd.Series or pd.DataFrame
+            The concatenated results of the method with the same index as the given column.
+        """
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = os.cpu_count()
+        chunks = [text_col.iloc[i:i + chunk_size] for i in range(0, len(text_col), chunk_size)]
+        if not chunks:
+            return getattr(self, method)(text_col=text_col, aliquot=None, **kwargs)
+
+        cache_size = self.doc_cache.max_size if self.doc_cache is not None else 0
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), initializer=_init_shard_worker,
+                                 initargs=(self.nlp, self.batch_size, cache_size, self.prune_pipes)) as executor:
+            results = executor.map(_run_shard, [method] * len(chunks), chunks, [kwargs] * len(chunks))
+            # the indicator is updated every time a worker returns the processed chunk
+            if aliquot:
+                results = self._progress_visual(results, iter_lenth=len(chunks), message='Chunks:')
+            results = list(results)
+
+        return pd.concat(results)
+
+    ### -----------------------------------------------------------------------------------
+
+    def _factorize(self, text_col, method):
+        """ Factorizes the given column into the codes of the rows and the column of distinct texts.
+            NaN rows get the code of the last distinct row which is NaN.
+            Prints the dedup ratio (the number of rows per distinct text) and saves it into self.dedup_stats.
+
+        Returns
+        -------
+        tuple
+            The numpy array of the codes and pd.Series of the distinct texts.
+        """
+        codes, uniques = pd.factorize(text_col)
+        has_na = bool((codes == -1).any())
+        values = np.empty(len(uniques) + has_na, dtype=object)
+        values[:len(uniques)] = np.asarray(uniques, dtype=object)
+        if has_na:
+            values[-1] = np.nan
+            codes = np.where(codes == -1, len(uniques), codes)
+
+        ratio = len(text_col) / len(values) if len(values) else 1.0
+        self.dedup_stats = {'method': method, 'rows': len(text_col), 'distinct': len(values), 'ratio': ratio}
+        print(f'Distinct texts: {len(values)} of {len(text_col)} rows (dedup ratio {ratio:.2f})')
+
+        return codes, pd.Series(values, name=text_col.name)
+
+    def _run_dedup(self, method, text_col, **kwargs):
+        """ Applies the given method to every distinct text of the given column once
+            and broadcasts the results to the original index.
+
+        Parameters
+        ----------
+        method : str
+            A name of the method of TextPreprocessing returning a row for every text.
+        text_col : pd.Series
+            A column of text data used as an object for the processing.
+        kwargs
+            Parameters of the method.
+
+        Returns
+        -------
+        pd.Series or pd.DataFrame
+            The results of the method with the same index as the given column.
+        """
+        codes, unique_col = self._factorize(text_col, method)
+        result = getattr(self, method)(text_col=unique_col, **kwargs)
+        result = result.iloc[codes]
+        result.index = text_col.index
+        return result
+
+    ### -----------------------------------------------------------------------------------
+
+    def _nlp_pipe(self, text_col, nlp=None, lower=False, aliquot=10, message='Progress:', cache=True, components=None):
+        """ Parses text data in the given column in batches using nlp.pipe.
+            NaN rows are skipped by the model and remain NaN in the result.
+            If self.doc_cache is used, every distinct text is parsed only once
+            and the rows with equal texts share the same Doc.
+            If self.disk_cache is used, Docs saved in previous sessions are loaded instead of parsing.
+
+        Parameters
+        ----------
+        text_col : pd.Series
+            A column of text data used as an object for the processing.
+        nlp : spacy model class, optional
+            If given, it is used to process, otherwise self.nlp is used (default is None)
+        lower : bool, optional
+            If True, converts strings to lowercase before processing(default is False).
+        aliquot : int or None, optional
+            If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
+            if None, doesn't show an indicator(default is 10).
+        message : str, optional
+            A description of the progress indicator (default is 'Progress:')
+        cache : bool, optional
+            If True, takes Docs from self.doc_cache and self.disk_cache and saves new ones there.
+            Use False if the returned Docs are modified by the caller (default is True)
+        components : list or None, optional
+            If given, only these pipeline components are enabled, otherwise the whole pipeline is used (default is None)
+
+        Returns
+        -------
+        pd.Series
+            Series of spacy Docs with the same index as the given column.
+        """
+        if nlp is None:
+            nlp = self.nlp
+
+        if components is not None:
+            with nlp.select_pipes(enable=components):
+                return self._nlp_pipe(text_col, nlp, lower, aliquot, message, cache)
+
+        notna = text_col.notna().to_numpy()
+        texts = text_col[notna].astype(str)
+        if lower:
+            texts = texts.str.lower()
+
+        # Docs are placed one by one because pandas and numpy treat them as sequences
+        result = np.full(len(text_col), np.nan, dtype=object)
+        positions = np.flatnonzero(notna)
+
+        if not cache or (self.doc_cache is None and self.disk_cache is None):
+            docs = nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)
+            if aliquot and len(texts):
+                docs = self._progress_visual(docs, iter_lenth=len(texts), aliquot=aliquot, message=message)
+            for doc, i in zip(docs, positions):
+                result[i] = doc
+            return pd.Series(result, index=text_col.index, name=text_col.name)
+
+        # parsing only the texts which are not in the cache, every distinct text once
+        config = DocCache.config_key(nlp)
+        parsed = {}
+        for text in texts:
+            if text not in parsed:
+                parsed[text] = self.doc_cache.get(config, text) if self.doc_cache is not None else None
+        new_texts = [text for text, doc in parsed.items() if doc is None]
+
+        # loading the texts saved in previous sessions
+        if self.disk_cache is not None and new_texts:
+            for text, doc in zip(new_texts, self.disk_cache.get_docs(nlp, new_texts)):
+                if doc is not None:
+                    parsed[text] = doc
+                    if self.doc_cache is not None:
+                        self.doc_cache.put(config, text, doc)
+            new_texts = [text for text in new_texts if parsed[text] is None]
+
+        docs = nlp.pipe(new_texts, batch_size=self.batch_size, n_process=self.n_process)
+        if aliquot and new_texts:
+            docs = self._progress_visual(docs, iter_lenth=len(new_texts), aliquot=aliquot, message=message)
+        for doc, text in zip(docs, new_texts):
+            parsed[text] = doc
+            if self.doc_cache is not None:
+                self.doc_cache.put(config, text, doc)
+
+        if self.disk_cache is not None and new_texts:
+            self.disk_cache.add_docs(nlp, new_texts, [parsed[text] for text in new_texts])
+
+        for i, text in zip(positions, texts):
+            result[i] = parsed[text]
+
+        return pd.Series(result, index=text_col.index, name=text_col.name)
+
+    # the annotations needed by the methods, the components assigning them (and the tok2vec layers they listen to) are run
+    METHOD_ANNOTATIONS = {'clear_from_label': ('doc.ents', 'token.ent_type', 'token.ent_iob'),
+                          'extract_ents': ('doc.ents', 'token.ent_type', 'token.ent_iob'),
+                          'extract_cats': ('doc.cats',),
+                          'vect': ('doc.tensor',)}
+
+    def _method_components(self, method, nlp=None):
+        """ Returns the names of the pipeline components needed for the given method.
+            The components which don't declare their annotations are always kept.
+            If self.prune_pipes is False or the method isn't in METHOD_ANNOTATIONS, returns None (the whole pipeline)."""
+        if nlp is None:
+            nlp = self.nlp
+        if not self.prune_pipes or method not in self.METHOD_ANNOTATIONS:
+            return None
+
+        needed = set(self.METHOD_ANNOTATIONS[method])
+        # static vectors don't need any component
+        if method == 'vect' and nlp.vocab.vectors.size:
+            needed = set()
+
+        enabled = {name for name in nlp.pipe_names
+                   if not nlp.get_pipe_meta(name).assigns or set(nlp.get_pipe_meta(name).assigns) & needed}
+        for name in nlp.pipe_names:
+            listeners = getattr(nlp.get_pipe(name), 'listening_components', None) or []
+            if enabled & set(listeners):
+                enabled.add(name)
+        return [name for name in nlp.pipe_names if name in enabled]
+
+    def pipeline_report(self, text_col=None, methods=None, sample=1000, nlp=None):
+        """ Measures the parsing time of a sample with the whole pipeline and with the components needed for every method.
+
+        Parameters
+        ----------
+        text_col : list, tuple, pd.Series or None, optional
+            If given, it is used as an object of the operation; if None, self.textcol_mod is used (default is None)
+        methods : list or None, optional
+            The names of the methods, if None, all methods from METHOD_ANNOTATIONS are used (default is None)
+        sample : int, optional
+            A number of the first not NaN texts used for the measurement (default is 1000)
+        nlp : spacy model class, optional
+            If given, it is used to process, otherwise self.nlp is used (default is None)
+
+        Returns
+        -------
+        pd.DataFrame
+            The components, the times in seconds and the speedup for every method.
+        """
+        if nlp is None:
+            nlp = self.nlp
+        if isinstance(text_col, (list, tuple, pd.Series)):
+            if isinstance(text_col, (list, tuple)):
+                text_col = pd.Series(text_col)
+        else:
+            text_col = self.textcol_mod
+        texts = list(text_col.dropna().astype(str).iloc[:sample])
+
+        def _measure():
+            start = time.perf_counter()
+            for _ in nlp.pipe(texts, batch_size=self.batch_size):
+                pass
+            return time.perf_counter() - start
+
+        full_time = _measure()
+        report = []
+        for method in methods or list(self.METHOD_ANNOTATIONS):
+            components = self._method_components(method, nlp)
+            if components is None:
+                components = list(nlp.pipe_names)
+            with nlp.select_pipes(enable=components):
+                pruned_time = _measure()
+            report.append((method, ', '.join(components) or 'tokenizer', round(full_time, 3), round(pruned_time, 3),
+                           round(full_time / pruned_time, 2) if pruned_time else np.nan))
+
+        report = pd.DataFrame(report, columns=['method', 'components', 'full_s', 'pruned_s', 'speedup'])
+        print(f'Pipeline: {nlp.pipe_names}, texts: {len(texts)}')
+        print(report.to_string(index=False))
+        return report
 
     ### -----------------------------------------------------------------------------------
 
-    def nlp_processing(self, text_col, lower=True, aliquot=10):
+    def nlp_processing(self, text_col, lower=True, aliquot=10, dedup=False):
         """ Applies nlp-processing to text data in the given column.
                     
         Parameters
@@ -1072,6 +3138,9 @@ class TextPreprocessing:
         aliquot : int or None, optional
             If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
             if None, doesn't show an indicator(default is 10).
+        dedup : bool, optional
+            If True, every distinct text is parsed once and its Doc is shared by all its rows.
+            The dedup ratio is printed and saved into self.dedup_stats (default is False)
                                                
         Returns
         -------
@@ -1079,28 +3148,12 @@ class TextPreprocessing:
 
             Series with processed text data.
         """
-        def _nlp_processing(string, aliquot=10):
-            if aliquot:
-                self.counter += 1
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
-            if pd.isna(string):
-                return np.nan
-            if lower:
-                return self.nlp(str(string).lower())
-            return self.nlp(str(string))
         if isinstance(text_col, (list, tuple, pd.Series)):
             if isinstance(text_col, (list, tuple)):
                 text_col = pd.Series(text_col)
-             # for visualization initialization
-            if aliquot:
-                self.iter_lenth = len(text_col)
-                self.counter = 0
-                self.progr = IntProgress(description='NLP-progress:', min=0, max=self.iter_lenth)
-                self.label = Label(value="0")
-                display(widgets.HBox([self.progr, self.label]))
-            result = text_col.apply(_nlp_processing, args=(aliquot,))
+            if dedup:
+                return self._run_dedup('nlp_processing', text_col, lower=lower, aliquot=aliquot)
+            result = self._nlp_pipe(text_col, lower=lower, aliquot=aliquot, message='NLP-progress:')
         else:
             result = None
                                 
@@ -1108,8 +3161,73 @@ class TextPreprocessing:
 
     ### ----------------------------------------------------------------------------------------
 
+    # the pipeline components setting the token attributes used in Matcher patterns,
+    # the lexical attributes (ORTH, LOWER, SHAPE, IS_*, LIKE_*, ...) need only the tokenizer
+    MATCHER_COMPONENTS = {'LEMMA': ('tok2vec', 'transformer', 'tagger', 'morphologizer', 'attribute_ruler', 'lemmatizer'),
+                          'POS': ('tok2vec', 'transformer', 'tagger', 'morphologizer', 'attribute_ruler'),
+                          'TAG': ('tok2vec', 'transformer', 'tagger', 'attribute_ruler'),
+                          'MORPH': ('tok2vec', 'transformer', 'morphologizer', 'attribute_ruler'),
+                          'DEP': ('tok2vec', 'transformer', 'parser'),
+                          'SENT_START': ('tok2vec', 'transformer', 'parser', 'senter'),
+                          'IS_SENT_START': ('tok2vec', 'transformer', 'parser', 'senter'),
+                          'ENT_TYPE': ('tok2vec', 'transformer', 'ner', 'entity_ruler'),
+                          'ENT_IOB': ('tok2vec', 'transformer', 'ner', 'entity_ruler'),
+                          'ENT_ID': ('tok2vec', 'transformer', 'ner', 'entity_ruler'),
+                          'ENT_KB_ID': ('tok2vec', 'transformer', 'ner', 'entity_ruler', 'entity_linker')}
+
+    def _matcher_components(self, pattern_list):
+        """ Returns the names of the pipeline components needed for the attributes used in the Matcher patterns."""
+        needed = set()
+        for pattern in pattern_list or []:
+            for token_spec in pattern:
+                for attr in token_spec:
+                    needed.update(self.MATCHER_COMPONENTS.get(attr.upper(), ()))
+        return [name for name in self.nlp.pipe_names if name in needed]
+
     def get_train_data(self, pattern_list=None, label=None, label_data=None, patterns_convert='ORTH',
-                       text_col=None, filtered=True, split=0.1, to_disk='./corpus/', aliquot=10, stratify=None):
+                       text_col=None, filtered=True, split=0.1, to_disk='./corpus/', aliquot=10, stratify=None,
+                       streaming=False, shard_size=10000):
+        """ Builds training data for spacy: labels the named entities found by Matcher with the given patterns (doc.ents)
+            or sets the categories from label_data (doc.cats), splits the data on train and dev sets and saves them as DocBin.
+            Only the pipeline components needed for the attributes of the patterns are run.
+
+        Parameters
+        ----------
+        pattern_list : list, tuple, pd.Series or None, optional
+            Patterns for Matcher. If patterns_convert is given, these are strings converted to the Matcher format (default is None)
+        label : str or None, optional
+            A label of the named entities found by Matcher (default is None)
+        label_data : list, tuple, pd.Series or None, optional
+            Dicts with the categories for every text, used if pattern_list isn't given (default is None)
+        patterns_convert : str or None, optional
+            A token attribute for converting strings into Matcher patterns (default is 'ORTH')
+        text_col : list, tuple, pd.Series or None, optional
+            If given, it is used as an object of the operation; if None, self.textcol_mod is used (default is None)
+        filtered : bool, optional
+            If True, removes NaN and empty texts from the result (default is True)
+        split : float or None, optional
+            A part of the dev set. If None or 0, the data aren't split (default is 0.1)
+        to_disk : str or None, optional
+            A directory for train.spacy and dev.spacy (for streaming, the directories 'train' and 'dev') (default is './corpus/')
+        aliquot : int or None, optional
+            If specified, showes a progress indicator with updating every specified number of times (aliquot the number),
+            if None, doesn't show an indicator(default is 10).
+        stratify : array-like or None, optional
+            Labels for the stratified split by sklearn train_test_split, not used for streaming (default is None)
+        streaming : bool, optional
+            If True, the Docs are not kept in memory: they are parsed by batches, every Doc is put into the train or dev set
+            by the hash of its text and written to the sharded DocBin files in to_disk (default is False)
+        shard_size : int, optional
+            The maximum number of Docs in one DocBin file for streaming (default is 10000)
+
+        Returns
+        -------
+        pd.Series, tuple or dict
+            The labeled Docs, or the tuple (train, dev) if split is given.
+            For streaming, dict with the numbers of Docs and the lists of files for 'train' and 'dev'.
+        """
+        from spacy.matcher import Matcher
+        from spacy.tokens import Span, Doc, DocBin
 
         # defining incoming text col
         if isinstance(text_col, (list, tuple, pd.Series)):
@@ -1132,21 +3250,26 @@ class TextPreprocessing:
         else:
             print('No patterns list or wrong format! No label_data! Nothing to process!\n \
             Use patterns list or label_data in pd.Series or list format')
+
+        if isinstance(pattern_list, (list, tuple, pd.Series)) and label:
+            matcher = Matcher(self.nlp.vocab)
+            matcher.add(label, list(pattern_list))
+            components = self._matcher_components(pattern_list)
+        else:
+            matcher = None
+            components = []
+        print(f"Pipeline components used: {components or 'tokenizer only'}")
+
+        if streaming:
+            return self._stream_train_data(text_col, matcher, label, label_data, components, split, to_disk,
+                                           shard_size, aliquot)
             
         # func for creating docs with the target labels
-        def _labeler(string, label):
-            # progress visialization
-            if aliquot:
-                self.counter += 1
-                if self.counter == 1 or self.counter % aliquot == 0 or self.counter == self.iter_lenth:
-                    self.progr.value = self.counter
-                    self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
-                    
-            if pd.isna(string):
+        def _labeler(doc, label):
+            if not isinstance(doc, Doc):
                 return np.nan
-            if string == '':
+            if doc.text == '':
                 return np.nan
-            doc = self.nlp(string)
             matches = matcher(doc)
             ents = []
             for match in matches:
@@ -1165,30 +3288,22 @@ class TextPreprocessing:
         
         
         # annotation text_data using Matcher and doc.ents (for Named Entity Recognition)
-        if isinstance(pattern_list, (list, tuple, pd.Series)) and label:
-            # for visualization initialization
-            if aliquot:
-                self.iter_lenth = len(text_col)
-                self.counter = 0
-                self.progr = IntProgress(description='Progress:', min=0, max=self.iter_lenth)
-                self.label = Label(value="0")
-                display(widgets.HBox([self.progr, self.label]))
-            matcher = Matcher(self.nlp.vocab)
-            matcher.add(label, pattern_list)
+        if matcher is not None:
             print('Matcher initialized successfully')
-            result = text_col.apply(_labeler, args=(label,))
+            with self.nlp.select_pipes(enable=components):
+                nlp_textcol = self._nlp_pipe(text_col, aliquot=aliquot, cache=False)
+            result = nlp_textcol.apply(_labeler, args=(label,))
 
         # annotation text_data using doc.cats (for Text Categorization Multilabel)
         elif isinstance(label_data, (list, tuple, pd.Series)):
             result = []
-            for text, dict in self._progress_visual(zip(text_col, label_data), iter_lenth=len(text_col), aliquot=aliquot):
-                if pd.isna(text):
-                    result.append(text)
-                else:
-                    nlp_text = self.nlp(text)
+            with self.nlp.select_pipes(enable=components):
+                nlp_textcol = self._nlp_pipe(text_col, aliquot=aliquot, cache=False)
+            for nlp_text, dict in zip(nlp_textcol, label_data):
+                if isinstance(nlp_text, Doc):
                     nlp_text.cats = dict
-                    result.append(nlp_text)
-            result = pd.Series(result)
+                result.append(nlp_text)
+            result = pd.Series(result, dtype=object)
                 
         # filtering n/a
         if filtered:
@@ -1197,6 +3312,7 @@ class TextPreprocessing:
         # spliting train data on train and test(valid) and saving to disk
         if split:
             print(f'Splitting data: TRAIN - {100 - split * 100}%,  TEST - {split * 100}%')
+            from sklearn.model_selection import train_test_split
             train, test = train_test_split(result, test_size=split, random_state=1982, shuffle=True, stratify=stratify)
             if to_disk:
                 _db_transform(train, f'{to_disk}train.spacy')
@@ -1209,6 +3325,216 @@ class TextPreprocessing:
             
         return result
 
+    def _stream_train_data(self, text_col, matcher, label, label_data, components, split, to_disk, shard_size, aliquot):
+        # labeling the Docs parsed by batches and writing them to the sharded DocBin files on the fly
+        from spacy.tokens import Span, DocBin
+
+        if not to_disk:
+            raise ValueError('Streaming needs the directory to_disk')
+        sets = ['train', 'dev'] if split else ['train']
+        for name in sets:
+            os.makedirs(os.path.join(to_disk, name), exist_ok=True)
+        bins = {name: DocBin() for name in sets}
+        files = {name: [] for name in sets}
+        counts = dict.fromkeys(sets, 0)
+
+        def _flush(name):
+            path = os.path.join(to_disk, name, f'{name}_{len(files[name]):05d}.spacy')
+            bins[name].to_disk(path)
+            files[name].append(path)
+            bins[name] = DocBin()
+
+        # NaN and empty texts are skipped, the categories are taken by the position of the text
+        if label_data is not None:
+            label_data = list(label_data)
+        positions = [i for i, text in enumerate(text_col) if isinstance(text, str) and text != '']
+        texts = (text_col.iloc[i] for i in positions)
+        progress = make_progress_bar(self.progress, len(positions), 'Labeling:') if aliquot else None
+
+        with self.nlp.select_pipes(enable=components):
+            for i, doc in zip(positions, self.nlp.pipe(texts, batch_size=self.batch_size, n_process=self.n_process)):
+                if matcher is not None:
+                    doc.ents = [Span(doc, start, end, label=label) for _, start, end in matcher(doc)]
+                elif label_data is not None:
+                    doc.cats = label_data[i]
+
+                # the set of a Doc is defined by the hash of its text, so equal texts are always in the same set
+                name = 'train'
+                if split and int(hashlib.sha1(doc.text.encode('utf-8')).hexdigest()[:8], 16) / 16 ** 8 < split:
+                    name = 'dev'
+                bins[name].add(doc)
+                counts[name] += 1
+                if len(bins[name]) >= shard_size:
+                    _flush(name)
+                if progress is not None:
+                    progress.update()
+
+        for name in sets:
+            if len(bins[name]) or not files[name]:
+                _flush(name)
+        if progress is not None:
+            progress.close()
+
+        for name in sets:
+            print(f'{name}: {counts[name]} docs in {len(files[name])} files, {os.path.join(to_disk, name)}')
+        return {name: {'docs': counts[name], 'files': files[name]} for name in sets}
+
+### ------------------------------------------------------------------------------------------
+
+# defining a class for the chunked processing of large files
+
+class StreamPreprocessing:
+    """ Reads a CSV or Parquet file by chunks, runs the sequence of TextPreprocessing operations on every chunk
+    and appends the results to the output file, so the used memory doesn't depend on the size of the file.
+
+    The operations are dicts {'op': method name, **parameters}. The operations 'replace', 'extract' and 'clean'
+    change the text column, the result of other operations (clear_from_label, extract_ents, map_all, ...)
+    is added to the output as columns: a series gets the name given by the key 'output' (the method name by default),
+    the columns of a dataframe get the prefix 'output'_ if it is given.
+
+    Parameters
+    ----------
+    nlp : spacy model class
+        Model for the specified language used for process.
+    operations : list
+        The dicts with the operations and their parameters applied in the given order.
+    column : str
+        A name of the text column in the file.
+    chunk_size : int, optional
+        A number of rows read and processed at once (default is 10000)
+    keep_columns : bool, optional
+        If True, all columns of the file are written to the output, otherwise only the text and the results (default is True)
+    **kwargs
+        The parameters for TextPreprocessing of every chunk (batch_size, n_process, disk_cache, ...).
+
+    Methods
+    -------
+    read_chunks
+        Yields the chunks of the file as dataframes.
+    process_chunk
+        Runs the operations on one chunk and returns the output dataframe.
+    run
+        Processes the whole file and writes the output file.
+    """
+
+    TEXT_OPERATIONS = ('replace', 'extract', 'clean')
+
+    def __init__(self, nlp, operations, column, chunk_size=10000, keep_columns=True, **kwargs):
+
+        self.nlp = nlp
+        self.operations = operations
+        self.column = column
+        self.chunk_size = chunk_size
+        self.keep_columns = keep_columns
+        kwargs.setdefault('progress', None)
+        # one disk cache is shared by all chunks, so the shards are filled before they are written
+        if isinstance(kwargs.get('disk_cache'), str):
+            kwargs['disk_cache'] = DocBinCache(kwargs['disk_cache'])
+        self.tp_kwargs = kwargs
+
+    @staticmethod
+    def _is_parquet(path):
+        return os.path.splitext(path)[1].lower() in ('.parquet', '.pq')
+
+    def read_chunks(self, path):
+        """ Yields the chunks of the CSV or Parquet file as dataframes."""
+        if self._is_parquet(path):
+            import pyarrow.parquet as pq
+
+            columns = None if self.keep_columns else [self.column]
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield batch.to_pandas()
+        else:
+            usecols = None if self.keep_columns else [self.column]
+            yield from pd.read_csv(path, chunksize=self.chunk_size, usecols=usecols)
+
+    def process_chunk(self, chunk):
+        """ Runs the operations on one chunk and returns the output dataframe."""
+        tp = TextPreprocessing(chunk[self.column], self.nlp, **self.tp_kwargs)
+        output = chunk.copy() if self.keep_columns else chunk[[self.column]].copy()
+
+        for operation in self.operations:
+            params = dict(operation)
+            name = params.pop('op')
+            out_name = params.pop('output', None)
+            method = getattr(tp, name)
+
+            if name in self.TEXT_OPERATIONS:
+                method(**params, update=True)
+                continue
+
+            params.setdefault('text_col', tp.textcol_mod)
+            if 'update' in inspect.signature(method).parameters:
+                params.setdefault('update', False)
+            result = method(**params)
+
+            if isinstance(result, pd.DataFrame):
+                result = result.set_axis(output.index)
+                if out_name:
+                    result = result.add_prefix(f'{out_name}_')
+                output = pd.concat([output, result], axis=1)
+            else:
+                output[out_name or name] = pd.Series(result).to_numpy()
+
+        output[f'{self.column}_mod'] = tp.textcol_mod.to_numpy()
+        return output
+
+    def run(self, input_path, output_path):
+        """ Processes the whole file by chunks and writes the output CSV or Parquet file.
+            The columns of the first chunk define the columns of the output.
+
+        Parameters
+        ----------
+        input_path : str
+            A path of the CSV or Parquet file.
+        output_path : str
+            A path of the output file, '.parquet' or '.pq' extension means Parquet, otherwise CSV.
+
+        Returns
+        -------
+        int
+            A number of processed rows.
+        """
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+        writer = None
+        columns = None
+        n_rows = 0
+        try:
+            for i, chunk in enumerate(self.read_chunks(input_path)):
+                output = self.process_chunk(chunk)
+                if columns is None:
+                    columns = list(output.columns)
+                output = output.reindex(columns=columns)
+
+                # appending the chunk to the output file
+                if self._is_parquet(output_path):
+                    import pyarrow as pa
+                    import pyarrow.parquet as pq
+
+                    if writer is None:
+                        # columns without values in the first chunk are written as strings
+                        schema = pa.Schema.from_pandas(output, preserve_index=False)
+                        schema = pa.schema([pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                                            for field in schema])
+                        writer = pq.ParquetWriter(output_path, schema)
+                    writer.write_table(pa.Table.from_pandas(output, schema=writer.schema, preserve_index=False))
+                else:
+                    output.to_csv(output_path, mode='a', header=(i == 0), index=False)
+
+                n_rows += len(output)
+                print(f'Chunk {i + 1}: {n_rows} rows processed')
+        finally:
+            if writer is not None:
+                writer.close()
+            if self.tp_kwargs.get('disk_cache') is not None:
+                self.tp_kwargs['disk_cache'].close()
+
+        return n_rows
+
+### ------------------------------------------------------------------------------------------
+
 class Categorizator:
     """ Provides a set of tools for bulding the dict of bindings between categories and patterns.
         Category is a word, a set of words or phrases that combines the meaning of a certain group of words or texts.
@@ -1226,6 +3552,9 @@ class Categorizator:
         If given, it is used as an object of the quoting calculation; if None, self.textcol_mod is used (default is None)
     only_w_vector : bool, optional
         If True, remains in the result only patterns which have vectors(default is True).
+    progress : str, ProgressBar subclass or None, optional
+        {widget|tqdm|log} A backend of progress indicators: ipywidgets in Jupyter notebooks,
+        tqdm in the console or messages in the log. If None, indicators are not shown (default is 'widget')
     
     Attributes
     ----------
@@ -1261,8 +3590,7 @@ class Categorizator:
         def _nlp_proc_(string, only_w_vector=True):
 
             # for progress visualization
-            self.progr.value += 1
-            self.label.value = f'{str(self.progr.value)} of {str(self.iter_lenth)}'
+            progress.update()
 
             # for checking NA
 
@@ -1285,15 +3613,31 @@ class Categorizator:
             
             # processing patterns
             print(f'Starting NLP-processing for {textlist_name}')
-            
+
+            # static vectors: only tokenizing, the vectors of all texts are computed at once
+            if _static_vectors_only(self.nlp):
+                is_str = text_list.map(lambda string: isinstance(string, str)).to_numpy(dtype=bool)
+                strings = text_list[is_str]
+                docs, matrix, has_vector = _static_doc_vectors(self.nlp, strings.str.lower())
+                for doc, vector in zip(docs, matrix):
+                    doc.vector = vector
+                keep = has_vector if only_w_vector else np.ones(len(docs), dtype=bool)
+                # Docs are placed one by one because pandas and numpy treat them as sequences
+                kept = np.empty(keep.sum(), dtype=object)
+                for i, doc in enumerate(doc for doc, flag in zip(docs, keep) if flag):
+                    kept[i] = doc
+                text_list = strings[keep].rename(0)
+                nlptexts = pd.Series(kept, index=text_list.index, name=1)
+                print(f'{textlist_name} processed')
+                print()
+                return text_list, nlptexts
+
             # initialization of progress counter
-            self.iter_lenth = len(text_list)
-            self.progr =  IntProgress(description='Progress: ', min=0, max=self.iter_lenth)
-            self.label = Label(value="0")
-            display(widgets.HBox([self.progr, self.label]))
+            progress = make_progress_bar(self.progress, len(text_list), 'Progress: ')
 
             # processing text_col
             text_result = text_list.apply(_nlp_proc_, args=(only_w_vector,))
+            progress.close()
             text_result = text_result.dropna() ###
             text_list = text_result.iloc[:, 0]
             nlptexts = text_result.iloc[:, 1]
@@ -1314,9 +3658,10 @@ class Categorizator:
     ### ------------------------------------------------------------------------------------------------------------------
          
     ### nlp-processing and saving categories and patterns
-    def __init__(self, nlp, pattern_list=None, cat_list=None, quoting=None, only_w_vector=True):
+    def __init__(self, nlp, pattern_list=None, cat_list=None, quoting=None, only_w_vector=True, progress='widget'):
                 
         self.nlp = nlp
+        self.progress = progress
         
         # nlp-processing of categories
         self.cat_list, self.nlpcats = self.textlist_nlp(cat_list, 'cat_list', only_w_vector=False)
@@ -1332,7 +3677,8 @@ class Categorizator:
     ### ------------------------------------------------------------------------------------------------------------------
     ## func for similarity calc
     def sim_calc(self, nlp1, nlp2, metric):
-        
+        from sklearn.metrics.pairwise import cosine_similarity, euclidean_distances
+
         if metric == 'cosine':
             sim = float(cosine_similarity(nlp1.vector.reshape(1, -1), nlp2.vector.reshape(1, -1)))
         elif metric == 'euclide':
@@ -1817,22 +4163,25 @@ class Categorizator:
                 return print('No pattern given. Use param "pattern_list".')
         
             
+            # the index of the text column is built once and reused by the next calls
+            quoting_index = getattr(self, '_quoting_index', None)
+            if quoting_index is None or quoting_index.text_col is not text_col:
+                quoting_index = QuotingIndex(text_col)
+                self._quoting_index = quoting_index
+
             quotes = []
             quotes_ratio = []
             if pattern_list.empty:
                 return print('Pattern list is empty!')
             else:
-                for pattern in self._progress_visual(pattern_list, aliquot=10):
+                for pattern in self._progress_visual(pattern_list, aliquot=max(10, len(pattern_list) // 100)):
                     if ratio == 'both':
-                        stats = text_col.str.contains(rf'\b{re.escape(pattern)}\b', case=False).agg(['sum', 'mean'])
-                        quotes.append(stats.iloc[0])
-                        quotes_ratio.append(stats.iloc[1])
+                        quotes.append(quoting_index.count(pattern))
+                        quotes_ratio.append(quoting_index.ratio(pattern))
                     elif ratio:
-                        stats = text_col.str.contains(rf'\b{re.escape(pattern)}\b', case=False).mean()
-                        quotes.append(stats)
+                        quotes.append(quoting_index.ratio(pattern))
                     else:
-                        stats = text_col.str.contains(rf'\b{re.escape(pattern)}\b', case=False).sum()
-                        quotes.append(stats)
+                        quotes.append(quoting_index.count(pattern))
                                                                        
                 print('Successfully.')
                 #print(quotes)
@@ -1867,13 +4216,10 @@ class Categorizator:
 
         if not iter_lenth:
             iter_lenth = len(iter_obj)
-        progr =  IntProgress(description=message, min=0, max=iter_lenth)
-        label = Label(value="0")
-        #total_label = Label(value=f' of {str(iter_lenth)}')
-        display(widgets.HBox([progr, label]))
+        progress = make_progress_bar(self.progress, iter_lenth, message)
         for i, elem in enumerate(iter_obj, 1):
             if i == 1 or i % aliquot == 0 or i == iter_lenth:
-                progr.value = i
-                label.value = f'{i} of {str(iter_lenth)}'
+                progress.update(i)
             yield elem
+        progress.close()
    
\ No newline at end of file